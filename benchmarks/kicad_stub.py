@@ -0,0 +1,129 @@
+"""
+Minimal stand-ins for the parts of pcbnew and wx the plugin touches, so the
+plugin code path can be benchmarked without KiCad. install() registers them
+in sys.modules; it must run before the plugin package is imported.
+
+Footprints are plain rectangles around an off-centre anchor that rotate about
+the anchor like KiCad footprints do. Every footprint method call counts as one
+"SWIG call" in CALLS.
+"""
+import math
+import sys
+import types
+
+CALLS = {"swig": 0}
+
+class VECTOR2I:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0, y=0):
+        self.x = int(x); self.y = int(y)
+
+class BOX2I:
+    """pcbnew semantics: BOX2I(position, size); Contains/Intersects are inclusive."""
+
+    def __init__(self, pos=None, size=None):
+        self.x, self.y = (pos.x, pos.y) if pos else (0, 0)
+        self.w, self.h = (size.x, size.y) if size else (0, 0)
+
+    def GetPosition(self): return VECTOR2I(self.x, self.y)
+    def GetEnd(self): return VECTOR2I(self.x + self.w, self.y + self.h)
+    def GetX(self): return self.x
+    def GetY(self): return self.y
+    def GetRight(self): return self.x + self.w
+    def GetBottom(self): return self.y + self.h
+
+    def Inflate(self, dx, dy):
+        self.x -= dx; self.y -= dy; self.w += 2 * dx; self.h += 2 * dy
+        return self
+
+    def Contains(self, v):
+        return self.x <= v.x <= self.x + self.w and self.y <= v.y <= self.y + self.h
+
+    def Intersects(self, o):
+        return (max(self.x, o.x) <= min(self.x + self.w, o.x + o.w)
+                and max(self.y, o.y) <= min(self.y + self.h, o.y + o.h))
+
+def FromMM(mm):
+    return int(float(mm) * 1000000.0)
+
+def ToMM(nm):
+    return nm / 1000000.0
+
+class FOOTPRINT:
+    def __init__(self, ref, w_nm=0, h_nm=0, x=0, y=0, deg=0.0, locked=False, selected=False):
+        if isinstance(ref, FOOTPRINT):  # copy constructor
+            CALLS["swig"] += 1
+            o = ref
+            ref, w_nm, h_nm, x, y, deg, locked, selected = (
+                o.ref, o.w, o.h, o.x, o.y, o.deg, o.locked, o.selected)
+        self.ref = ref; self.w = w_nm; self.h = h_nm
+        self.x = x; self.y = y; self.deg = deg
+        self.locked = locked; self.selected = selected
+
+    def GetReference(self): CALLS["swig"] += 1; return self.ref
+    def IsLocked(self): CALLS["swig"] += 1; return self.locked
+    def IsSelected(self): CALLS["swig"] += 1; return self.selected
+    def GetPosition(self): CALLS["swig"] += 1; return VECTOR2I(self.x, self.y)
+    def GetOrientationDegrees(self): CALLS["swig"] += 1; return self.deg
+
+    def SetPosition(self, v):
+        CALLS["swig"] += 1; self.x = v.x; self.y = v.y
+
+    def SetOrientationDegrees(self, deg):
+        CALLS["swig"] += 1; self.deg = deg
+
+    def GetBoundingBox(self, include_text=False):
+        CALLS["swig"] += 1
+        a = math.radians(self.deg); c = math.cos(a); s = math.sin(a)
+        # body spans [-w/4, 3w/4] x [-h/4, 3h/4] around the anchor
+        xs = []; ys = []
+        for px in (-self.w / 4, 3 * self.w / 4):
+            for py in (-self.h / 4, 3 * self.h / 4):
+                xs.append(px * c + py * s); ys.append(-px * s + py * c)
+        x0 = math.floor(min(xs)); y0 = math.floor(min(ys))
+        return BOX2I(VECTOR2I(self.x + x0, self.y + y0),
+                     VECTOR2I(math.ceil(max(xs)) - x0, math.ceil(max(ys)) - y0))
+
+class BOARD:
+    def __init__(self, footprints, filename=""):
+        self.footprints = footprints; self.filename = filename
+
+    def GetFootprints(self): return self.footprints
+    def GetFileName(self): return self.filename
+
+class BOARD_COMMIT:
+    def __init__(self, frame=None): self.items = []
+    def Modify(self, item): CALLS["swig"] += 1; self.items.append(item)
+    def Push(self, message): CALLS["swig"] += 1
+
+class ActionPlugin:
+    def register(self): pass
+
+class _Anything:
+    """Accepts any wx call the dialog module makes at import time."""
+
+    def __init__(self, *a, **k): pass
+    def __call__(self, *a, **k): return _Anything()
+    def __getattr__(self, name): return _Anything()
+    def __or__(self, other): return self
+    __ror__ = __or__
+
+def install():
+    pcbnew = types.ModuleType("pcbnew")
+    for name in ("VECTOR2I", "BOX2I", "FromMM", "ToMM", "FOOTPRINT", "BOARD", "BOARD_COMMIT",
+                 "ActionPlugin"):
+        setattr(pcbnew, name, globals()[name])
+    pcbnew.Refresh = lambda: None
+    pcbnew.GetBoard = lambda: None
+    pcbnew.GetBoardFrame = lambda: None
+
+    wx = types.ModuleType("wx")
+    wx.__getattr__ = lambda name: _Anything()
+    wx.Dialog = type("Dialog", (_Anything,), {})
+    wx.LogMessage = lambda msg: None
+    wx.Bell = lambda: None
+    wx.CallAfter = lambda fn, *a, **k: fn(*a, **k)
+
+    sys.modules["pcbnew"] = pcbnew
+    sys.modules["wx"] = wx
@@ -0,0 +1,126 @@
+"""
+P2B benchmark suite.
+
+    python benchmarks/run.py                     # default scenarios
+    python benchmarks/run.py small huge          # selected scenarios
+    python benchmarks/run.py --json out.json --budget benchmarks/budget.json
+
+Each scenario writes a synthetic schematic hierarchy, builds a stand-in
+board (kicad_stub) and runs the plugin's own parse and Apply code paths.
+Reported per scenario: parse time, placement time, collision checks
+(search probes / rectangle tests, from the engine's _PlacementStats),
+stand-in pcbnew calls, the tracemalloc high-water mark and, in the JSON
+output, the per-phase timings. With --budget, exits non-zero when a scenario
+exceeds its time budget.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "plugins"))
+
+import kicad_stub  # noqa: E402
+kicad_stub.install()
+
+import synth  # noqa: E402
+from p2b_place_from_schematic import engine  # noqa: E402
+from p2b_place_from_schematic.plugin import P2B  # noqa: E402
+
+# name -> (symbols, depth, fan-out, placement parameters)
+SCENARIOS = {
+    "tiny":   (100,    1, 2,  dict()),
+    "small":  (1000,   2, 3,  dict()),
+    "medium": (5000,   2, 6,  dict()),
+    "opt":    (1000,   2, 3,  dict(optimise=True, rot_step_deg=10.0)),
+    "crowded": (1000,  2, 3,  dict(auto_scale=False, scale=0.3)),  # the slider's default 30 %
+    "sheets":  (3000,  1, 20, dict()),
+    "cluster": (3000,  1, 20, dict(cluster="sheet")),
+    "large":  (20000,  3, 5,  dict()),
+    "huge":   (50000,  3, 8,  dict()),
+}
+# "huge" takes minutes; run it by name
+DEFAULT_SCENARIOS = ("tiny", "small", "medium", "opt", "crowded", "sheets", "cluster", "large")
+
+def _params(area_mm, extra):
+    P = dict(engine.DEFAULT_PARAMS)
+    P.update(x0=0.0, y0=0.0, w=area_mm, h=area_mm, use_rotation=True)
+    P.update(extra)
+    return P
+
+def _run(root, sizes, P):
+    t0 = time.perf_counter()
+    sch = engine._SchematicSymbols(root)
+    sch.refresh()
+    t1 = time.perf_counter()
+    board = synth.make_board(kicad_stub, sizes)
+    kicad_stub.CALLS["swig"] = 0
+    t2 = time.perf_counter()
+    stats = P2B()._apply_placement(board, sch.symbols, P, sch.sheets, sch.anchors)
+    t3 = time.perf_counter()
+    return dict(parse_s=t1 - t0, place_s=t3 - t2,
+                probes=stats.probes, rect_tests=stats.tests,
+                pcbnew_calls=kicad_stub.CALLS["swig"],
+                phases={k: round(v, 4) for k, v in stats.phases.items()})
+
+def run_scenario(name, tmp, memory=True):
+    n, depth, fanout, extra = SCENARIOS[name]
+    root, refs = synth.write_hierarchy(os.path.join(tmp, name), n, depth=depth, fanout=fanout)
+    sizes = synth.footprint_sizes(refs)
+    P = _params(synth.area_for(sizes), extra)
+    gc.collect()
+    res = _run(root, sizes, P)
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        _run(root, sizes, P)
+        res["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    res.update(scenario=name, symbols=n, sheets=sum(fanout ** d for d in range(depth + 1)))
+    return res
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("scenarios", nargs="*", help="subset of: " + ", ".join(SCENARIOS))
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--budget", help="JSON {scenario: max seconds (parse + place)}")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    a = ap.parse_args(argv)
+
+    names = a.scenarios or list(DEFAULT_SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error("unknown scenario(s): " + ", ".join(unknown))
+    budget = {}
+    if a.budget:
+        with open(a.budget, "r", encoding="utf-8") as f:
+            budget = json.load(f)
+
+    print("%-8s %7s %6s %9s %9s %10s %11s %11s %8s" % (
+        "scenario", "symbols", "sheets", "parse s", "place s", "probes", "rect tests", "pcbnew", "peak MB"))
+    results = []; over = []
+    with tempfile.TemporaryDirectory(prefix="p2b-bench-") as tmp:
+        for name in names:
+            r = run_scenario(name, tmp, memory=not a.no_memory)
+            results.append(r)
+            print("%-8s %7d %6d %9.3f %9.3f %10d %11d %11d %8s" % (
+                name, r["symbols"], r["sheets"], r["parse_s"], r["place_s"], r["probes"],
+                r["rect_tests"], r["pcbnew_calls"], "%.1f" % r["peak_mb"] if "peak_mb" in r else "-"))
+            limit = budget.get(name)
+            if limit is not None and r["parse_s"] + r["place_s"] > limit:
+                over.append("%s: %.2f s > %.2f s" % (name, r["parse_s"] + r["place_s"], limit))
+    if a.json:
+        with open(a.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    for line in over:
+        print("over budget: " + line, file=sys.stderr)
+    return 1 if over else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
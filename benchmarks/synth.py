@@ -0,0 +1,115 @@
+"""
+Synthetic inputs for the benchmarks: hierarchical .kicad_sch trees and
+footprint sets of mixed sizes. Everything is seeded, so a scenario always
+produces the same files and boards.
+"""
+import os
+import random
+
+# (share, width mm range, height mm range): passives, ICs, connectors
+_SIZE_CLASSES = (
+    (0.75, (1.0, 3.2), (0.5, 1.6)),
+    (0.20, (3.0, 10.0), (3.0, 10.0)),
+    (0.05, (8.0, 30.0), (4.0, 12.0)),
+)
+
+_LIB_SYMBOL = '''    (symbol "Synth:P{i}"
+      (property "Reference" "U" (at 0 2.54 0) (effects (font (size 1.27 1.27))))
+      (property "Value" "P{i}" (at 0 -2.54 0) (effects (font (size 1.27 1.27))))
+      (symbol "P{i}_0_1"
+        (rectangle (start -2.54 2.54) (end 2.54 -2.54) (stroke (width 0.254) (type default)) (fill (type background)))
+      )
+{pins}    )
+'''
+_PIN = '      (pin passive line (at {x} 0 0) (length 2.54) (name "~" (effects (font (size 1.27 1.27)))) (number "{n}" (effects (font (size 1.27 1.27)))))\n'
+
+_SYMBOL = '''  (symbol (lib_id "Synth:P{lib}") (at {x:.2f} {y:.2f} {rot}) (unit 1)
+    (in_bom yes) (on_board yes) (dnp no)
+    (uuid "{ref}-0000")
+    (property "Reference" "{ref}" (at {x:.2f} {ty:.2f} 0) (effects (font (size 1.27 1.27))))
+    (property "Value" "V{lib}" (at {x:.2f} {vy:.2f} 0) (effects (font (size 1.27 1.27))))
+    (pin "1" (uuid "{ref}-0001"))
+    (pin "2" (uuid "{ref}-0002"))
+  )
+'''
+
+_SHEET = '''  (sheet (at {x} {y}) (size 20 10) (fields_autoplaced yes)
+    (stroke (width 0.1524) (type solid)) (fill (color 0 0 0 0.0000))
+    (uuid "sheet-{name}")
+    (property "Sheetname" "{name}" (at {x} {y} 0) (effects (font (size 1.27 1.27))))
+    (property "Sheetfile" "{name}.kicad_sch" (at {x} {y} 0) (effects (font (size 1.27 1.27))))
+  )
+'''
+
+def _sheet_names(depth, fanout):
+    """Sheet file stems in creation order: root first, then breadth-first children."""
+    out = ["root"]
+    level = ["root"]
+    for _ in range(depth):
+        nxt = []
+        for parent in level:
+            for k in range(fanout):
+                nxt.append("%s_%d" % (parent if parent != "root" else "s", k))
+        out.extend(nxt)
+        level = nxt
+    return out
+
+def write_hierarchy(dirpath, n_symbols, depth=2, fanout=4, n_lib=40, seed=1):
+    """
+    Write a schematic tree of 'fanout' sub-sheets per sheet, 'depth' levels
+    below the root, with 'n_symbols' placed symbols spread evenly across all
+    sheets. Returns (root path, list of references).
+    """
+    rnd = random.Random(seed)
+    os.makedirs(dirpath, exist_ok=True)
+    sheets = _sheet_names(depth, fanout)
+    children = {name: [] for name in sheets}
+    for name in sheets[1:]:
+        parent = name.rsplit("_", 1)[0] if name.count("_") > 1 else "root"
+        children[parent].append(name)
+    lib = "".join(_LIB_SYMBOL.format(i=i, pins="".join(_PIN.format(x=2.54 * k, n=k) for k in range(1, 9)))
+                  for i in range(n_lib))
+    per_sheet = max(1, n_symbols // len(sheets))
+    refs = []
+    for idx, name in enumerate(sheets):
+        count = per_sheet if idx < len(sheets) - 1 else n_symbols - per_sheet * (len(sheets) - 1)
+        side = max(50.0, 12.0 * (max(count, 1) ** 0.5))  # page grows with content
+        parts = ['(kicad_sch (version 20231120) (generator "p2b-bench")\n  (uuid "%s")\n  (paper "A3")\n' % name,
+                 "  (lib_symbols\n", lib, "  )\n"]
+        for _ in range(max(count, 0)):
+            ref = "R%d" % len(refs)
+            refs.append(ref)
+            x = rnd.uniform(10, side); y = rnd.uniform(10, side)
+            parts.append(_SYMBOL.format(lib=rnd.randrange(n_lib), x=x, y=y, ty=y - 2.54, vy=y + 2.54,
+                                        rot=rnd.choice((0, 90, 180, 270)), ref=ref))
+        for k, child in enumerate(children[name]):
+            parts.append(_SHEET.format(x=20 + 25 * k, y=5, name=child))
+        parts.append(")\n")
+        with open(os.path.join(dirpath, name + ".kicad_sch"), "w", encoding="utf-8") as f:
+            f.write("".join(parts))
+    return os.path.join(dirpath, "root.kicad_sch"), refs
+
+def footprint_sizes(refs, seed=1):
+    """{ref: (w_mm, h_mm)} drawn from passive / IC / connector size classes."""
+    rnd = random.Random(seed)
+    out = {}
+    for ref in refs:
+        u = rnd.random()
+        for share, (wlo, whi), (hlo, hhi) in _SIZE_CLASSES:
+            if u < share:
+                break
+            u -= share
+        out[ref] = (rnd.uniform(wlo, whi), rnd.uniform(hlo, hhi))
+    return out
+
+def make_board(stub, sizes, seed=1):
+    """Stand-in BOARD holding one footprint per entry of 'sizes'."""
+    rnd = random.Random(seed)
+    fps = [stub.FOOTPRINT(ref, stub.FromMM(w), stub.FromMM(h), deg=rnd.choice((0.0, 90.0)))
+           for ref, (w, h) in sizes.items()]
+    return stub.BOARD(fps)
+
+def area_for(sizes, fill=0.35):
+    """Square placement area (mm) in which the footprints cover about 'fill'."""
+    total = sum(w * h for w, h in sizes.values())
+    return (total / fill) ** 0.5
@@ -0,0 +1,18 @@
+"""
+Toolbar entry point. pcbnew imports every plugin when it starts, so this
+module imports nothing but pcbnew; wx, the engine and NumPy are loaded by
+the first Run().
+"""
+import pcbnew
+
+class P2BAction(pcbnew.ActionPlugin):
+    def defaults(self):
+        self.name = "P2B: Move Footprints from Schematic"
+        self.category = "Place/Move"
+        self.description = "Map symbol positions to PCB (scale/offset, selection, rotation, collision)"
+        self.show_toolbar_button = True
+        self.icon_file_name = ""
+
+    def Run(self):
+        from .plugin import P2B
+        P2B().Run()
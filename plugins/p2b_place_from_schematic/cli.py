@@ -0,0 +1,112 @@
+"""
+Command-line placement without KiCad:
+
+    python -m p2b_place_from_schematic top.kicad_sch footprints.csv -o placements.json
+
+Footprint geometry files are described in engine.load_footprints.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from .engine import DEFAULT_PARAMS, _PlacementStats, _SchematicSymbols, load_footprints, place
+
+def _parser():
+    D = DEFAULT_PARAMS
+    ap = argparse.ArgumentParser(
+        prog="p2b_place_from_schematic",
+        description="Map schematic symbol positions to collision-free footprint placements.")
+    ap.add_argument("schematic", help="top-level .kicad_sch (sub-sheets are followed)")
+    ap.add_argument("footprints", help="footprint geometry, .json or .csv")
+    ap.add_argument("-o", "--output", help="output file (.json or .csv); default: JSON on stdout")
+    ap.add_argument("--format", choices=("json", "csv"), help="output format (default: from --output extension)")
+    ap.add_argument("--x0", type=float, default=D["x0"], help="area origin X (mm)")
+    ap.add_argument("--y0", type=float, default=D["y0"], help="area origin Y (mm)")
+    ap.add_argument("--width", type=float, default=D["w"], help="area width (mm)")
+    ap.add_argument("--height", type=float, default=D["h"], help="area height (mm)")
+    ap.add_argument("--scale", type=float, help="schematic-to-board scale factor (default: auto fit)")
+    ap.add_argument("--clearance", type=float, default=D["clearance_mm"], help="clearance (mm)")
+    ap.add_argument("--step", type=float, default=D["step_mm"], help="grid step (mm)")
+    ap.add_argument("--rotation", action="store_true", help="take rotation from the schematic")
+    ap.add_argument("--no-collisions", action="store_true", help="place at targets, ignoring overlaps")
+    ap.add_argument("--collision", choices=("bbox", "courtyard"), default=D["collision"],
+                    help="courtyard: bboxes as broad phase, footprint outlines (JSON 'outline') decide")
+    ap.add_argument("--optimise", action="store_true", help="local optimiser")
+    ap.add_argument("--rot-step", type=float, default=D["rot_step_deg"], help="optimiser Δθ (deg)")
+    ap.add_argument("--refine", type=float, default=D["refine_s"], metavar="SECONDS",
+                    help="anneal the greedy result for up to this long")
+    ap.add_argument("--search", choices=("grid", "ring"), default=D["search"],
+                    help="nearest-free-spot search: occupancy grid (needs NumPy) or 8-direction rings")
+    ap.add_argument("--cluster", choices=("off", "sheet", "nets"), default=D["cluster"],
+                    help="pack footprints per schematic sheet or per shared nets (JSON 'nets') into blocks")
+    ap.add_argument("--starts", type=int, default=D["starts"],
+                    help="try this many placement orderings in parallel and keep the best")
+    ap.add_argument("--seed", type=int, default=D["seed"], help="seed of the random orderings")
+    ap.add_argument("-j", "--jobs", type=int, default=0, help="processes for sheet parsing (used from 32 MB of sheets)")
+    ap.add_argument("--stats", metavar="FILE", help="append run and per-footprint stats (JSON lines)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="print phase timings and counters")
+    return ap
+
+def _write(rows, out, fmt):
+    if fmt == "csv":
+        w = csv.writer(out)
+        w.writerow(("ref", "x_mm", "y_mm", "rotation", "placed"))
+        for ref, pose in rows:
+            if pose is None:
+                w.writerow((ref, "", "", "", 0))
+            else:
+                w.writerow((ref, pose[0], pose[1], "" if pose[2] is None else pose[2], 1))
+    else:
+        json.dump([dict(ref=ref, placed=pose is not None,
+                        x_mm=pose and pose[0], y_mm=pose and pose[1], rotation=pose and pose[2])
+                   for ref, pose in rows], out, indent=1)
+        out.write("\n")
+
+def main(argv=None):
+    a = _parser().parse_args(argv)
+    for path in (a.schematic, a.footprints):
+        if not os.path.isfile(path):
+            print("p2b: cannot read %s: no such file" % path, file=sys.stderr)
+            return 1
+    stats = _PlacementStats()
+    with stats.phase("parse"):
+        sch = _SchematicSymbols(a.schematic, workers=a.jobs)
+        sch.refresh()
+    symbols = sch.symbols
+    if not symbols:
+        print("p2b: no symbols found in %s" % a.schematic, file=sys.stderr)
+        return 1
+    params = dict(
+        x0=a.x0, y0=a.y0, w=a.width, h=a.height,
+        scale=a.scale, auto_scale=a.scale is None,
+        avoid_collisions=not a.no_collisions,
+        collision=a.collision,
+        clearance_mm=a.clearance, step_mm=a.step,
+        use_rotation=a.rotation,
+        optimise=a.optimise,
+        rot_step_deg=a.rot_step,
+        refine_s=a.refine,
+        search=a.search,
+        cluster=a.cluster,
+        starts=max(1, a.starts),
+        seed=a.seed,
+    )
+    with stats.phase("snapshot"):
+        footprints = load_footprints(a.footprints)
+    rows = place(symbols, footprints, params, stats, sch.sheets, sch.anchors)
+    fmt = a.format or ("csv" if (a.output or "").lower().endswith(".csv") else "json")
+    if a.output:
+        with open(a.output, "w", encoding="utf-8", newline="") as out:
+            _write(rows, out, fmt)
+    else:
+        _write(rows, sys.stdout, fmt)
+    skipped = sum(1 for _, pose in rows if pose is None)
+    if a.verbose:
+        print(stats.summary(), file=sys.stderr)
+    else:
+        print("p2b: placed %d, skipped %d." % (len(rows) - skipped, skipped), file=sys.stderr)
+    if a.stats:
+        stats.write_jsonl(a.stats, schematic=a.schematic)
+    return 0
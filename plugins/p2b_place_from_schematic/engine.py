@@ -0,0 +1,2340 @@
+"""
+Placement engine: schematic parsing and collision-free placement on plain
+integers (nm). Nothing here imports pcbnew or wx, so it also runs headless
+(see cli.py); the KiCad plugin feeds it footprint geometry read from pcbnew.
+"""
+import os
+import sys
+import csv
+import json
+import hashlib
+import math
+import random
+import time
+import threading
+import contextlib
+import concurrent.futures
+import multiprocessing
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy the ring search is used
+    np = None
+
+_NM_PER_MM = 1000000
+
+def _mm_to_nm(v):
+    # same truncation as pcbnew.FromMM
+    return int(float(v) * _NM_PER_MM)
+
+def _nm_to_mm(v):
+    return v / _NM_PER_MM
+
+# ===================== Schematic parsing ====================================
+
+_SCH_CHUNK = 1 << 20  # characters read per tokenizer refill
+_SHEETFILE_PROPS = ('"Sheetfile"', '"Sheet file"')
+
+def _split_atoms(seg):
+    """Tokens of a string-free stretch of S-expression text."""
+    return seg.replace("(", " ( ").replace(")", " ) ").split()
+
+def _escaped(s):
+    return (len(s) - len(s.rstrip("\\"))) % 2 == 1
+
+def _iter_tokens(f, chunk=_SCH_CHUNK):
+    """
+    Stream S-expression tokens from text file 'f', 'chunk' characters at a
+    time: '(', ')', atoms, and strings (kept with their quotes). Text is split
+    on quotes first so that only string-free stretches are split on parens
+    and whitespace. Whatever may continue past the end of a chunk (an atom or
+    an unterminated string) is carried over to the next one.
+    """
+    tail = ""
+    while True:
+        data = f.read(chunk)
+        parts = (tail + data).split('"')
+        tail = ""
+        toks = []
+        last = len(parts) - 1
+        i = 0
+        while True:
+            atoms = _split_atoms(parts[i])
+            if i == last:
+                if data and atoms and parts[i].endswith(atoms[-1]):
+                    tail = atoms.pop()
+                toks.extend(atoms)
+                break
+            toks.extend(atoms)
+            # parts[i+1 ...] are inside a string; \" does not close it
+            j = i + 1
+            s = parts[j]
+            while _escaped(s) and j < last:
+                j += 1
+                s += '"' + parts[j]
+            if j == last:  # no closing quote in this chunk
+                if data:
+                    tail = '"' + s
+                else:
+                    toks.append('"' + s)
+                break
+            toks.append('"' + s + '"')
+            i = j + 1
+        yield from toks
+        if not data:
+            return
+
+def _unquote(tok):
+    if tok[:1] == '"':
+        return tok[1:-1].replace('\\"', '"')
+    return tok
+
+def _skip_list(toks):
+    """Consume tokens up to and including the ')' closing the current list."""
+    depth = 1
+    for tok in toks:
+        if tok == "(":
+            depth += 1
+        elif tok == ")":
+            depth -= 1
+            if not depth:
+                return
+
+def _list_fields(toks):
+    """
+    Consume the rest of the current list; return its direct sub-lists as
+    (head, [atoms...]). Anything nested deeper is skipped.
+    """
+    fields = []
+    for tok in toks:
+        if tok == ")":
+            break
+        if tok != "(":
+            continue
+        head = next(toks, ")")
+        if head == ")":
+            continue
+        args = []
+        for t in toks:
+            if t == ")":
+                break
+            if t == "(":
+                _skip_list(toks)
+            else:
+                args.append(t)
+        fields.append((head, args))
+    return fields
+
+def _symbol_record(fields):
+    ref = at = None
+    for head, args in fields:
+        if head == "at" and at is None and len(args) >= 2:
+            at = args
+        elif head == "property" and ref is None and len(args) >= 2 and args[0] == '"Reference"':
+            ref = _unquote(args[1]).strip()
+    if not (ref and at):
+        return None
+    try:
+        x = float(at[0]); y = float(at[1])
+        rot = float(at[2]) if len(at) > 2 else None
+    except ValueError:
+        return None
+    return (ref, x, y, rot)
+
+def _iter_schematic_items(path):
+    """
+    One streaming pass over a .kicad_sch. Yields ("symbol", ref, x, y, rot)
+    for placed symbols and ("sheet", filename, centre) for sub-sheet
+    references (centre = [x, y] of the sheet box, or None), in file order.
+    Only top-level items are decoded; lib_symbols and every other section
+    are skipped token by token.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        toks = _iter_tokens(f)
+        for tok in toks:           # find "(kicad_sch"
+            if tok == "(":
+                next(toks, None)
+                break
+        for tok in toks:
+            if tok == ")":
+                break
+            if tok != "(":
+                continue
+            head = next(toks, ")")
+            if head == "symbol":
+                rec = _symbol_record(_list_fields(toks))
+                if rec:
+                    yield ("symbol",) + rec
+            elif head == "sheet":
+                fname = at = size = None
+                for fhead, args in _list_fields(toks):
+                    if fhead == "property" and len(args) >= 2 and args[0] in _SHEETFILE_PROPS:
+                        fname = fname or _unquote(args[1])
+                    elif fhead == "at" and at is None and len(args) >= 2:
+                        at = args
+                    elif fhead == "size" and size is None and len(args) >= 2:
+                        size = args
+                if fname:
+                    try:
+                        centre = [float(at[0]) + float(size[0]) / 2, float(at[1]) + float(size[1]) / 2]
+                    except (TypeError, ValueError):
+                        centre = None
+                    yield ("sheet", fname, centre)
+            elif head != ")":
+                _skip_list(toks)
+
+def _scan_schematic_file(path):
+    """Parse one sheet file: ([(ref, x, y, rot), ...], [sub-sheet file, ...], [its centre, ...])."""
+    symbols = []; children = []; centres = []
+    for item in _iter_schematic_items(path):
+        if item[0] == "symbol":
+            symbols.append(item[1:])
+        else:
+            children.append(item[1])
+            centres.append(item[2])
+    return symbols, children, centres
+
+# ===================== Schematic parse cache ================================
+
+_SCH_CACHE_NAME = ".p2b-schematic-cache.json"
+_SCH_CACHE_VERSION = 2
+# Spawning a pool costs about a second; below this many stale bytes (about
+# 2.5 s of serial parsing) it is not worth it
+_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+
+def _python_executable():
+    """
+    A Python interpreter to start pool workers with, or None. Inside pcbnew
+    sys.executable is usually the host program, not Python; then the
+    interpreter installed with the embedded one is looked for (KiCad ships
+    one on Windows and macOS, Linux builds use the system Python).
+    """
+    exe = sys.executable or ""
+    if os.path.basename(exe).lower().startswith("python") and os.path.isfile(exe):
+        return exe
+    for rel in (("bin", "python3"), ("bin", "python"), ("python.exe",), ("bin", "python.exe")):
+        path = os.path.join(sys.exec_prefix, *rel)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _process_pool(workers):
+    """
+    ProcessPoolExecutor of 'workers' freshly spawned interpreters, or None
+    where no Python interpreter is found. Never forks: the caller may be the
+    pcbnew GUI process or one of its threads. Workers import only the engine
+    (the package skips pcbnew in them, see __init__).
+    """
+    exe = _python_executable()
+    if exe is None:
+        return None
+    ctx = multiprocessing.get_context("spawn")
+    ctx.set_executable(exe)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+
+def _file_sha1(path, chunk=_SCH_CHUNK):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(chunk), b""):
+            h.update(data)
+    return h.hexdigest()
+
+class _SymbolTable:
+    """
+    Symbol positions as parallel columns: x and y in mm and the rotation in
+    degrees (NaN = none) in compact float arrays, plus the interned
+    references and their row numbers. Reads like the {ref: (x, y, rot)}
+    dict it replaces; columns() gives NumPy views for bulk work. A table is
+    not changed once built and handed out.
+    """
+
+    def __init__(self, rows=()):
+        self.refs = []   # row -> ref
+        self.row = {}    # ref -> row
+        self.x = array("d")
+        self.y = array("d")
+        self.rot = array("d")
+        for ref, x, y, rot in rows:
+            self.add(ref, x, y, rot)
+
+    @classmethod
+    def of(cls, symbols):
+        """'symbols' as a table: returned as is if it is one, else read from a {ref: (x, y, rot)} mapping."""
+        if isinstance(symbols, cls):
+            return symbols
+        return cls((ref, x, y, rot) for ref, (x, y, rot) in symbols.items())
+
+    def add(self, ref, x, y, rot):
+        """Append a symbol; a reference seen before keeps its row and takes the new values."""
+        r = math.nan if rot is None else rot
+        i = self.row.get(ref)
+        if i is None:
+            ref = sys.intern(ref)
+            self.row[ref] = len(self.refs)
+            self.refs.append(ref)
+            self.x.append(x); self.y.append(y); self.rot.append(r)
+        else:
+            self.x[i] = x; self.y[i] = y; self.rot[i] = r
+
+    def columns(self):
+        """(x, y, rot) as NumPy float64 views of the columns."""
+        return (np.frombuffer(self.x, dtype=np.float64), np.frombuffer(self.y, dtype=np.float64),
+                np.frombuffer(self.rot, dtype=np.float64))
+
+    def __len__(self):
+        return len(self.refs)
+
+    def __contains__(self, ref):
+        return ref in self.row
+
+    def __iter__(self):
+        return iter(self.refs)
+
+    def __getitem__(self, ref):
+        i = self.row[ref]
+        r = self.rot[i]
+        return (self.x[i], self.y[i], None if r != r else r)
+
+    def __eq__(self, other):
+        if not isinstance(other, _SymbolTable):
+            return NotImplemented
+        return (self.refs == other.refs and self.x == other.x and self.y == other.y
+                and self.rot.tobytes() == other.rot.tobytes())  # NaN == NaN here
+
+    def fingerprint(self):
+        """SHA-1 of the references and columns; equal tables give equal fingerprints."""
+        h = hashlib.sha1("\0".join(self.refs).encode("utf-8"))
+        for col in (self.x, self.y, self.rot):
+            h.update(col.tobytes())
+        return h.hexdigest()
+
+    def get(self, ref, default=None):
+        return self[ref] if ref in self.row else default
+
+    def keys(self):
+        return iter(self.refs)
+
+    def values(self):
+        return (self[ref] for ref in self.refs)
+
+    def items(self):
+        return ((ref, self[ref]) for ref in self.refs)
+
+class _SchematicSymbols:
+    """
+    Symbol table of a schematic hierarchy with a per-sheet parse cache.
+    Each sheet is fingerprinted by (mtime, size, sha1); refresh() re-parses only
+    sheets whose content changed and rebuilds 'symbols' (a _SymbolTable). With a
+    'cache_path' the per-sheet records also persist across sessions.
+    Parsing is pure-Python and CPU-bound, so 'workers' > 1 fans it out to
+    processes rather than threads.
+    """
+
+    def __init__(self, root_sch_path, cache_path=None, workers=0):
+        self.root = os.path.abspath(root_sch_path)
+        self.cache_path = cache_path
+        self.workers = workers  # >1: parse stale sheets in a process pool
+        self.symbols = _SymbolTable()  # ref -> (x, y, rot)
+        self.sheets = {}   # ref -> abs path of the sheet it comes from
+        self.anchors = {}  # sheet abs path -> [x, y] of its top-level sheet box on the root page (root: None)
+        self._sheets = {}  # abs path -> record (see _store)
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not self.cache_path: return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == _SCH_CACHE_VERSION:
+            self._sheets = data.get("sheets", {})
+
+    def _save(self):
+        if not (self.cache_path and self._dirty): return
+        tmp = self.cache_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": _SCH_CACHE_VERSION, "sheets": self._sheets}, f)
+            os.replace(tmp, self.cache_path)
+            self._dirty = False
+        except OSError:
+            pass  # read-only project dir: keep the in-memory cache only
+
+    def _cached(self, ap):
+        """Record of sheet 'ap' if its content is unchanged since it was parsed; else None."""
+        st = os.stat(ap)
+        rec = self._sheets.get(ap)
+        if not rec:
+            return None
+        if rec["mtime"] == st.st_mtime_ns and rec["size"] == st.st_size:
+            return rec
+        if rec["sha1"] == _file_sha1(ap):
+            rec["mtime"] = st.st_mtime_ns; rec["size"] = st.st_size  # touched only
+            self._dirty = True
+            return rec
+        return None
+
+    def _store(self, ap, parsed):
+        st = os.stat(ap)
+        symbols, children, centres = parsed
+        rec = dict(mtime=st.st_mtime_ns, size=st.st_size, sha1=_file_sha1(ap),
+                   symbols=symbols, children=children, centres=centres)
+        self._sheets[ap] = rec
+        self._dirty = True
+        return rec
+
+    def _parse_all(self, paths, done=None):
+        """
+        Parse 'paths' -> list of (symbols, children, centres), in a process pool
+        if enabled and they add up to _PARALLEL_MIN_BYTES; done(parsed), if
+        given, is called as each sheet comes in.
+        """
+        out = []
+        if self.workers > 1 and len(paths) > 1 and sum(map(os.path.getsize, paths)) >= _PARALLEL_MIN_BYTES:
+            try:
+                pool = _process_pool(self.workers)
+                if pool is not None:
+                    with pool:
+                        for parsed in pool.map(_scan_schematic_file, paths):
+                            out.append(parsed)
+                            if done is not None: done(parsed)
+            except Exception:
+                pass  # no usable subprocesses here: the rest is parsed serially
+        for p in paths[len(out):]:
+            out.append(_scan_schematic_file(p))
+            if done is not None: done(out[-1])
+        return out
+
+    def refresh(self, progress=None):
+        """
+        Bring 'symbols' up to date with the files; returns True if it changed.
+        'progress', if given, is called as progress(sheets, symbols) with the
+        counts read so far after each sheet.
+        """
+        # Discover the hierarchy breadth-first; the stale sheets of each level
+        # are parsed together (in parallel if enabled)
+        level = [self.root]; seen = set(); counts = [0, 0]  # sheets, symbols read
+        def read(symbols):
+            counts[0] += 1; counts[1] += len(symbols)
+            if progress is not None:
+                progress(counts[0], counts[1])
+        while level:
+            recs = []; stale = []
+            for ap in level:
+                if ap in seen or not os.path.exists(ap): continue
+                seen.add(ap)
+                rec = self._cached(ap)
+                if rec is None:
+                    stale.append(ap)
+                else:
+                    recs.append((ap, rec))
+                    read(rec["symbols"])
+            for ap, parsed in zip(stale, self._parse_all(stale, lambda parsed: read(parsed[0]))):
+                recs.append((ap, self._store(ap, parsed)))
+            level = [os.path.abspath(os.path.join(os.path.dirname(ap), child))
+                     for ap, rec in recs for child in rec["children"]]
+        # Merge depth-first in file order, so the last writer of a reference
+        # wins exactly as in a plain recursive walk
+        out = _SymbolTable(); where = {}; anchors = {}; visited = set()
+        def visit(ap, anchor):
+            if ap in visited or ap not in seen: return
+            visited.add(ap)
+            anchors[ap] = anchor
+            rec = self._sheets[ap]
+            for ref, x, y, rot in rec["symbols"]:
+                out.add(ref, x, y, rot)
+                where[ref] = ap
+            this_dir = os.path.dirname(ap)
+            for child, centre in zip(rec["children"], rec["centres"]):
+                # sub-sheets sit where their top-level ancestor sits on the root page
+                visit(os.path.abspath(os.path.join(this_dir, child)), centre if ap == self.root else anchor)
+        visit(self.root, None)
+        self.anchors = anchors
+        # forget sheets that left the hierarchy
+        for ap in [ap for ap in self._sheets if ap not in visited]:
+            del self._sheets[ap]; self._dirty = True
+        self._save()
+        if where != self.sheets:
+            self.sheets.clear()
+            self.sheets.update(where)
+        if out == self.symbols:
+            return False
+        self.symbols = out
+        return True
+
+def _read_schematic_symbols(root_sch_path: str, workers=0):
+    sch = _SchematicSymbols(root_sch_path, workers=workers)
+    sch.refresh()
+    return sch.symbols
+
+# ===================== Spatial index ========================================
+
+_INDEX_CELL_STEPS = 8       # index cell edge, in placement grid steps
+_INDEX_MIN_CELL_MM = 4.0    # ... but never finer than this
+
+# never intersects: x0 > any x1 and x1 < any x0
+_DEAD_RECT = (1 << 62, 1 << 62, -(1 << 62), -(1 << 62))
+
+def _rects_intersect(a, b):
+    # Same rule as BOX2I::Intersects: touching edges count as overlap.
+    return max(a[0], b[0]) <= min(a[2], b[2]) and max(a[1], b[1]) <= min(a[3], b[3])
+
+def _index_cell_nm(step_nm):
+    return max(step_nm * _INDEX_CELL_STEPS, _mm_to_nm(_INDEX_MIN_CELL_MM))
+
+class _RectIndex:
+    """
+    Uniform grid hash over placed rectangles (x0, y0, x1, y1) in nm.
+    Each rect is registered in every cell it touches, so a query only tests
+    rects sharing a cell with the probe instead of scanning all of them.
+    An optional read-only 'base' index (static obstacles) is checked along
+    with the own rects; its handles show up as negative numbers in query().
+    """
+
+    def __init__(self, cell_nm, base=None):
+        self.cell = max(1, int(cell_nm))
+        self.base = base
+        self._rects = {}   # handle -> rect
+        self._shapes = {}  # handle -> convex polygon, for rects that have one
+        self._cells = {}   # (cx, cy) -> set of handles
+        self._next = 0
+        self.last = None   # handle of the latest insert()
+        self.queries = 0   # intersects() calls
+        self.tests = 0     # rect-vs-rect tests they ran
+        self._arr = None   # NumPy mirror for batch tests, see as_array()
+        self._arr_n = 0
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __iter__(self):
+        return iter(self._rects.values())
+
+    def _keys(self, r):
+        c = self.cell
+        for cx in range(r[0] // c, r[2] // c + 1):
+            for cy in range(r[1] // c, r[3] // c + 1):
+                yield (cx, cy)
+
+    def insert(self, r, shape=None):
+        """Add rect (and its narrow-phase polygon, if any); returns a handle for remove()."""
+        h = self.last = self._next; self._next += 1
+        self._rects[h] = r
+        if shape is not None:
+            self._shapes[h] = shape
+        for k in self._keys(r):
+            bucket = self._cells.get(k)
+            if bucket is None:
+                self._cells[k] = {h}
+            else:
+                bucket.add(h)
+        return h
+
+    def remove(self, h):
+        r = self._rects.pop(h)
+        self._shapes.pop(h, None)
+        if h < self._arr_n:
+            self._arr[h] = _DEAD_RECT
+        for k in self._keys(r):
+            bucket = self._cells[k]
+            bucket.discard(h)
+            if not bucket:
+                del self._cells[k]
+
+    def query(self, r):
+        """Yield (handle, rect) for every stored rect intersecting r."""
+        if self.base is not None:
+            for h, o in self.base.query(r):
+                yield ~h, o
+        seen = set()
+        rects = self._rects
+        for k in self._keys(r):
+            for h in self._cells.get(k, ()):
+                if h in seen: continue
+                seen.add(h)
+                o = rects[h]
+                if _rects_intersect(r, o):
+                    yield h, o
+
+    def items(self):
+        """Yield (rect, polygon or None) for the own rects, without the base index."""
+        shapes = self._shapes
+        for h, r in self._rects.items():
+            yield r, shapes.get(h)
+
+    def as_array(self):
+        """
+        All rects as an (n, 4) int64 NumPy array, row = handle; removed rects
+        get a row that intersects nothing. Synced incrementally; the base
+        index's rects, if any, come first.
+        """
+        n = self._next
+        if self._arr is None or len(self._arr) < n:
+            arr = np.empty((max(64, 2 * n), 4), dtype=np.int64)
+            if self._arr_n:
+                arr[:self._arr_n] = self._arr[:self._arr_n]
+            self._arr = arr
+        for h in range(self._arr_n, n):
+            self._arr[h] = self._rects.get(h, _DEAD_RECT)
+        self._arr_n = n
+        if self.base is not None:
+            return np.concatenate((self.base.as_array(), self._arr[:n]))
+        return self._arr[:n]
+
+    def intersects(self, r, shape=None, skip=()):
+        """
+        True if rect r hits a stored rect other than the handles in 'skip'.
+        Where both r and the stored rect carry a polygon ('shape', see
+        _RectGeometry.shape; may be a callable building it on demand), a rect
+        hit only counts if the polygons intersect too.
+        """
+        self.queries += 1
+        if self.base is not None:
+            n = self.base.tests
+            hit = self.base.intersects(r, shape)
+            self.tests += self.base.tests - n
+            if hit:
+                return True
+        rects = self._rects
+        shapes = self._shapes
+        n = 0
+        for k in self._keys(r):
+            for h in self._cells.get(k, ()):
+                n += 1
+                if _rects_intersect(r, rects[h]) and h not in skip:
+                    other = shapes.get(h) if shape is not None else None
+                    if other is not None:
+                        if callable(shape):
+                            shape = shape()
+                        if not _polys_intersect(shape, other):
+                            continue
+                    self.tests += n
+                    return True
+        self.tests += n
+        return False
+
+# ===================== Placement core =======================================
+
+def _rotated_extent(e, ddeg):
+    """Axis-aligned box around extent 'e' rotated by 'ddeg' about the anchor (KiCad sense)."""
+    a = math.radians(ddeg)
+    c = math.cos(a); s = math.sin(a)
+    xs = []; ys = []
+    for x in (e[0], e[2]):
+        for y in (e[1], e[3]):
+            xs.append(x * c + y * s)
+            ys.append(-x * s + y * c)
+    return (int(round(min(xs))), int(round(min(ys))), int(round(max(xs))), int(round(max(ys))))
+
+def _rotated_points(pts, ddeg):
+    """Points rotated by 'ddeg' about the anchor (KiCad sense), rounded to nm."""
+    a = math.radians(ddeg)
+    c = math.cos(a); s = math.sin(a)
+    return [(int(round(x * c + y * s)), int(round(-x * s + y * c))) for x, y in pts]
+
+def _convex_hull(pts):
+    """Convex hull of integer points (monotone chain), without collinear points."""
+    pts = sorted(set(pts))
+    if len(pts) <= 2:
+        return pts
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+def _inflated_hull(pts, c):
+    """Hull of 'pts' grown by 'c' along x and y (Minkowski sum with a square), as the bbox is."""
+    if c:
+        pts = [(x + dx, y + dy) for x, y in pts for dx in (-c, c) for dy in (-c, c)]
+    return tuple(_convex_hull(pts))
+
+def _polys_intersect(a, b):
+    """Separating-axis test of two convex polygons; touching counts, as for rects."""
+    for poly in (a, b):
+        n = len(poly)
+        for i in range(n):
+            x0, y0 = poly[i]; x1, y1 = poly[i - n + 1]
+            nx = y0 - y1; ny = x1 - x0
+            pa = [x * nx + y * ny for x, y in a]
+            pb = [x * nx + y * ny for x, y in b]
+            if max(pa) < min(pb) or max(pb) < min(pa):
+                return False
+    return True
+
+class _RectGeometry:
+    """
+    Clearance-inflated bbox of one footprint relative to its anchor, per
+    orientation. Candidate probes then work on plain integers. Built from a
+    raw bbox 'bbox' (nm, relative to the anchor) at orientation 'deg'; other
+    orientations use the bounding box of the rotated rectangle. The plugin
+    subclass reads them from pcbnew instead.
+    With an outline 'hull' (points relative to the anchor at 'deg', e.g. the
+    courtyard) the rect is only the broad phase: hull(deg) gives the inflated
+    convex hull for the narrow phase, cached per orientation like the extent.
+    """
+
+    def __init__(self, bbox=None, pos=(0, 0), deg=None, clr_nm=0, hull=None):
+        self.pos = pos
+        self.deg = deg
+        self.clr = clr_nm
+        self._bbox = bbox
+        self._ext = {}  # deg -> (dx0, dy0, dx1, dy1)
+        self.reads = 0  # extents computed (pcbnew bbox reads for board footprints)
+        self._outline = hull
+        self._hulls = {}  # deg -> inflated convex hull, relative to the anchor
+
+    def extent(self, deg):
+        """Inflated bbox offsets around the anchor at orientation 'deg' (None = as is)."""
+        e = self._ext.get(deg)
+        if e is None:
+            e = self._read_extent(deg)
+            self.reads += 1
+            if self._outline:
+                # the broad-phase rect must hold the hull
+                pts = self._outline
+                if deg is not None and self.deg is not None and deg != self.deg:
+                    pts = _rotated_points(pts, deg - self.deg)
+                h = self._hulls[deg] = _inflated_hull(pts, self.clr)
+                e = (min(e[0], min(p[0] for p in h)), min(e[1], min(p[1] for p in h)),
+                     max(e[2], max(p[0] for p in h)), max(e[3], max(p[1] for p in h)))
+            self._ext[deg] = e
+        return e
+
+    def hull(self, deg):
+        """Inflated convex hull around the anchor at 'deg', or None to use the rect alone."""
+        if not self._outline:
+            return None
+        h = self._hulls.get(deg)
+        if h is None:
+            self.extent(deg)
+            h = self._hulls[deg]
+        return h
+
+    def shape(self, x, y, deg):
+        """hull(deg) placed at (x, y), or None."""
+        h = self.hull(deg)
+        if h is None:
+            return None
+        return tuple((x + px, y + py) for px, py in h)
+
+    def _read_extent(self, deg):
+        e = self._bbox
+        if deg is not None and self.deg is not None and deg != self.deg:
+            e = _rotated_extent(e, deg - self.deg)
+        c = self.clr
+        return (e[0] - c, e[1] - c, e[2] + c, e[3] + c)
+
+    def prefill(self, degs):
+        """Compute the extents for all 'degs' up front."""
+        for deg in degs:
+            self.extent(deg)
+
+    def detached(self):
+        """Plain _RectGeometry with the extents and hulls computed so far (picklable, no pcbnew)."""
+        g = _RectGeometry(self._bbox, self.pos, self.deg, self.clr, self._outline)
+        g._ext = dict(self._ext)
+        g._hulls = dict(self._hulls)
+        return g
+
+    def known_degs(self):
+        """Orientations whose extents are already computed."""
+        return tuple(self._ext)
+
+    def rect(self, x, y, deg):
+        e = self.extent(deg)
+        return (x + e[0], y + e[1], x + e[2], y + e[3])
+
+def _inside(r, area):
+    return area[0] <= r[0] and area[1] <= r[1] and r[2] <= area[2] and r[3] <= area[3]
+
+def _grid_pack_without_overlap(geom, target, deg, placed_rects, step_nm, area):
+    """
+    Place 'geom' starting near target (x, y), scanning a grid inside 'area':
+    left->right in 'step_nm' increments; wrap to next row on overflow.
+    Returns the pose (x, y, deg) if placed; None otherwise.
+    """
+    # Grid origin and limits
+    ax0, ay0, ax1, ay1 = area
+
+    # Snap target to grid
+    def snap(v, base):
+        if step_nm <= 0: return v
+        off = (v - base) % step_nm
+        return v - off
+
+    start_x = max(ax0, snap(target[0], ax0))
+    start_y = max(ay0, snap(target[1], ay0))
+
+    y = start_y
+    max_rows = max(1, int((ay1 - ay0) // max(step_nm, 1)))
+    max_cols = max(1, int((ax1 - ax0) // max(step_nm, 1)))
+
+    rows_tried = 0
+    while y <= ay1 and rows_tried <= max_rows:
+        x = start_x
+        cols_tried = 0
+        while x <= ax1 and cols_tried <= max_cols:
+            r = geom.rect(x, y, deg)
+            # Fully inside area and no overlaps?
+            if _inside(r, area) and not placed_rects.intersects(r):
+                placed_rects.insert(r)
+                return (x, y, deg)
+            x += step_nm; cols_tried += 1
+        y += step_nm; rows_tried += 1
+
+    return None
+
+
+def _place_ok(geom, x, y, deg, area, placed_rects):
+    """Return expanded bbox as (x0, y0, x1, y1) if inside area and no intersection; else None."""
+    r = geom.rect(x, y, deg)
+    if not _inside(r, area):
+        return None
+    shape = None
+    if geom.hull(deg) is not None:
+        shape = lambda: geom.shape(x, y, deg)  # built only on a broad-phase hit
+    if placed_rects.intersects(r, shape):
+        return None
+    return r
+
+def _best_ring_candidate(geom, ring, degs, nudges, target, area, placed_rects):
+    """
+    One optimiser ring tested at once (NumPy): every (ring point, orientation,
+    nudge) rectangle is checked against the area and, in one broadcast,
+    against the placed rectangles near the ring. Returns (x, y, deg, rect) of
+    the feasible candidate closest to 'target', the first in probe order on
+    ties as in the serial loop, or None.
+    """
+    tx, ty = target
+    pts = np.array(ring, dtype=np.int64)                               # (P, 2)
+    nud = np.array(nudges, dtype=np.int64)                             # (N, 2)
+    ext = np.array([geom.extent(d) for d in degs], dtype=np.int64)     # (D, 4)
+    D = len(degs); N = len(nud)
+
+    # anchors and rects in probe order: ring point, then orientation, then nudge
+    anc = np.broadcast_to((pts[:, None, :] + nud[None, :, :])[:, None], (len(pts), D, N, 2))
+    rects = np.concatenate((anc + ext[None, :, None, :2], anc + ext[None, :, None, 2:]), axis=-1).reshape(-1, 4)
+    anc = anc.reshape(-1, 2)
+    ok = ((rects[:, 0] >= area[0]) & (rects[:, 1] >= area[1]) &
+          (rects[:, 2] <= area[2]) & (rects[:, 3] <= area[3]))
+    if not ok.any():
+        return None
+
+    # placed rects touching the ring's span, then all pairs at once
+    live = rects[ok]
+    q = placed_rects.as_array()
+    if len(q):
+        near = ((q[:, 0] <= live[:, 2].max()) & (q[:, 2] >= live[:, 0].min()) &
+                (q[:, 1] <= live[:, 3].max()) & (q[:, 3] >= live[:, 1].min()))
+        q = q[near]
+    if len(q):
+        placed_rects.queries += 1
+        placed_rects.tests += len(live) * len(q)
+        hit = ((rects[:, None, 0] <= q[None, :, 2]) & (q[None, :, 0] <= rects[:, None, 2]) &
+               (rects[:, None, 1] <= q[None, :, 3]) & (q[None, :, 1] <= rects[:, None, 3])).any(axis=1)
+        ok &= ~hit
+        if not ok.any():
+            return None
+
+    ex = anc[:, 0] - tx; ey = anc[:, 1] - ty
+    d2 = np.where(ok, ex * ex + ey * ey, np.iinfo(np.int64).max)
+    k = int(np.argmin(d2))
+    return int(anc[k, 0]), int(anc[k, 1]), degs[(k // N) % D], tuple(int(v) for v in rects[k])
+
+# Ring probe directions, in the order the ring search tries them: W, E, N, S, NW, NE, SW, SE
+_RING_DIRS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1))
+
+def _ray_range(dv, p0, p1, o0, o1, s):
+    """
+    Ring numbers r for which the span [p0, p1] moved by dv * r * s meets
+    [o0, o1] (edges touching count), as (lo, hi); None if it never does.
+    """
+    if dv == 0:
+        return (-(1 << 62), 1 << 62) if o0 <= p1 and p0 <= o1 else None
+    if dv > 0:
+        return (-((p1 - o0) // s), (o1 - p0) // s)
+    return (-((o1 - p0) // s), (p1 - o0) // s)
+
+def _ray_first_free(e, tx, ty, dx, dy, s, lo, hi, placed_rects):
+    """
+    First ring r in [lo, hi] at which the rect with extent 'e' around
+    (tx + dx*r*s, ty + dy*r*s) hits no placed rect, or None; plus the number
+    of placed rects looked at. One index query for the whole stretch: each
+    rect along it blocks an interval of r, and the answer is the first gap.
+    """
+    px0 = tx + e[0]; px1 = tx + e[2]
+    py0 = ty + e[1]; py1 = ty + e[3]
+    a = (px0 + dx * lo * s, py0 + dy * lo * s, px1 + dx * lo * s, py1 + dy * lo * s)
+    b = (px0 + dx * hi * s, py0 + dy * hi * s, px1 + dx * hi * s, py1 + dy * hi * s)
+    swept = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+    blocked = []
+    n = 0
+    for _, o in placed_rects.query(swept):
+        n += 1
+        bx = _ray_range(dx, px0, px1, o[0], o[2], s)
+        by = _ray_range(dy, py0, py1, o[1], o[3], s)
+        if bx is None or by is None:
+            continue
+        r0 = max(bx[0], by[0]); r1 = min(bx[1], by[1])
+        if r0 <= r1 and r1 >= lo and r0 <= hi:
+            blocked.append((r0, r1))
+    r = lo
+    for r0, r1 in sorted(blocked):
+        if r0 > r:
+            break
+        r = max(r, r1 + 1)
+    return (r if r <= hi else None), n
+
+def _ray_nearest_place(geom, target, deg, placed_rects, step_nm, area, max_radius, stats=None):
+    """
+    The ring search without optimiser, computed per ray instead of per
+    probe: same pose (smallest ring, then ring order) for a footprint without
+    a narrow-phase hull. Rays are swept in windows of rings, the first as
+    wide as the footprint and each next one twice as wide, so a part that
+    fits nearby never looks far and a far one costs a few queries instead of
+    a probe per ring and direction. Returns the pose (inserted into
+    'placed_rects') or None.
+    """
+    e = geom.extent(deg)
+    tx, ty = target
+    s = step_nm
+    rays = []
+    for dx, dy in _RING_DIRS:
+        # rings keeping the rect inside: its corner meets the shrunk area
+        ix = _ray_range(dx, tx + e[0], tx + e[0], area[0], area[2] - (e[2] - e[0]), s)
+        iy = _ray_range(dy, ty + e[1], ty + e[1], area[1], area[3] - (e[3] - e[1]), s)
+        if ix is None or iy is None:
+            continue
+        rays.append((dx, dy, max(1, ix[0], iy[0]), min(max_radius, ix[1], iy[1])))
+    far = max([hi for _, _, _, hi in rays] or [0])
+    span = max(1, max(e[2] - e[0], e[3] - e[1]) // s)
+    first = 1
+    probes = 0
+    tests = 0
+    best = None
+    while best is None and first <= far:
+        last = first + span - 1
+        for dx, dy, lo, hi in rays:
+            lo = max(lo, first); hi = min(hi, last)
+            if lo > hi:
+                continue
+            probes += 1
+            r, n = _ray_first_free(e, tx, ty, dx, dy, s, lo, hi, placed_rects)
+            tests += n
+            if r is not None and (best is None or r < best[0]):
+                best = (r, dx, dy)
+        first = last + 1
+        span *= 2
+    placed_rects.tests += tests
+    pose = None
+    r = 0
+    if best is not None:
+        r, dx, dy = best
+        x = tx + dx * r * s; y = ty + dy * r * s
+        placed_rects.insert(geom.rect(x, y, deg))
+        pose = (x, y, deg)
+    if stats is not None: stats.searched(probes + 1, r)
+    return pose
+
+def _closest_nonoverlap_place(geom, target, deg, placed_rects, step_nm, area,
+                              optimise=False, rot_step_deg=10.0, stats=None):
+    """
+    Try target; on collision, expand search radius and pick the nearest feasible position.
+    If 'optimise' is True, also test small ±Δθ rotations and sub-step offsets locally and
+    choose the candidate minimising distance to target.
+    Returns the chosen pose (x, y, deg), or None if nothing fits. Probes and the
+    ring reached are added to 'stats' (a _PlacementStats) if given.
+    """
+    tx, ty = target
+    probes = 1
+    r = 0
+
+    # 1) try target as-is
+    bb = _place_ok(geom, tx, ty, deg, area, placed_rects)
+    if bb:
+        placed_rects.insert(bb, geom.shape(tx, ty, deg))
+        if stats is not None: stats.searched(probes, r)
+        return (tx, ty, deg)
+
+    # Spiral/ring search: radius grows in 'step_nm'; sample 8 directions per ring
+    ax0, ay0, ax1, ay1 = area
+
+    # Without optimiser the first free ring point per ray is found by
+    # interval sweeps, and the 1000-ring cap (a UI guard) is not needed
+    if not optimise and geom.hull(deg) is None:
+        max_radius = int(max(ax1-ax0, ay1-ay0) // max(step_nm, 1)) + 1
+        return _ray_nearest_place(geom, target, deg, placed_rects, step_nm, area, max_radius, stats)
+
+    # Candidate accumulator when optimiser=True (we pick best of local tries)
+    best = None  # (dist2, x, y, bbox, chosen_deg)
+
+    # Orientation variants for the optimiser (none if orientation is unknown)
+    if deg is None:
+        degs = (None,)
+    else:
+        degs = (deg, deg + rot_step_deg, deg - rot_step_deg)
+    # micro nudges at half-step in 4 dirs to densify packing
+    half = max(1, step_nm // 2)
+    nudges = ((0,0), (half,0), (-half,0), (0,half), (0,-half))
+
+    # reasonable cap to avoid UI stalls
+    max_radius = int(max(ax1-ax0, ay1-ay0) // max(step_nm, 1)) + 1
+    max_radius = min(max_radius, 1000)
+
+    pose = None
+    for r in range(1, max_radius+1):
+        # Generate ring points (8-cardinal + diagonals) at radius r*step_nm
+        delta = r * step_nm
+        ring = (
+            (tx - delta, ty),          # W
+            (tx + delta, ty),          # E
+            (tx,         ty - delta),  # N
+            (tx,         ty + delta),  # S
+            (tx - delta, ty - delta),  # NW
+            (tx + delta, ty - delta),  # NE
+            (tx - delta, ty + delta),  # SW
+            (tx + delta, ty + delta),  # SE
+        )
+
+        # Fast path: no optimiser → accept first feasible (closest by construction)
+        if not optimise:
+            for x, y in ring:
+                probes += 1
+                bb = _place_ok(geom, x, y, deg, area, placed_rects)
+                if bb:
+                    placed_rects.insert(bb, geom.shape(x, y, deg))
+                    pose = (x, y, deg)
+                    break
+            if pose:
+                break
+            continue
+
+        # Optimiser: for each ring point, also try ±Δθ and tiny sub-step nudges
+        # (batched on rects; with a narrow phase the serial loop below decides)
+        if np is not None and geom.hull(deg) is None:
+            probes += len(ring) * len(degs) * len(nudges)
+            hit = _best_ring_candidate(geom, ring, degs, nudges, target, area, placed_rects)
+            if hit is not None:
+                x, y, d, bb = hit
+                placed_rects.insert(bb)
+                pose = (x, y, d)
+                break
+            continue
+
+        for px, py in ring:
+            for d in degs:
+                for dx, dy in nudges:
+                    x = px + dx; y = py + dy
+                    probes += 1
+                    bb = _place_ok(geom, x, y, d, area, placed_rects)
+                    if bb:
+                        ex = x - tx; ey = y - ty
+                        d2 = ex*ex + ey*ey
+                        if (best is None) or (d2 < best[0]):
+                            best = (d2, x, y, bb, d)
+
+        # If we found something at this radius, take it and stop (closest ring)
+        if best is not None:
+            _, x, y, bb, d = best
+            placed_rects.insert(bb, geom.shape(x, y, d))
+            pose = (x, y, d)
+            break
+
+    if stats is not None: stats.searched(probes, r)
+    return pose
+
+# ===================== Occupancy-grid search ================================
+
+_GRID_MAX_CELLS = 25000000  # larger rasters fall back to the ring search
+_GRID_WINDOW0 = 8           # first search window half-width, in steps
+
+class _OccupancyGrid:
+    """
+    Rasters of the placement area at 'step_nm' resolution (NumPy), updated as
+    parts are placed: 'touch' has every cell a placed rectangle touches (edges
+    included), 'core' only the cells it covers completely. A candidate clear
+    in 'touch' is certainly free; one blocked in 'core' certainly is not; the
+    few in between get the exact index test.
+    Candidates are the anchors target + (i, j) * step: shifting by one step
+    shifts the covered cells by exactly one, so one summed-area table per
+    raster answers "clear?" for every offset of a window at once.
+    """
+
+    def __init__(self, area, step_nm):
+        ax0, ay0, ax1, ay1 = area
+        self.area = area
+        self.step = step_nm
+        self.nx = (ax1 - ax0) // step_nm + 1
+        self.ny = (ay1 - ay0) // step_nm + 1
+        self.touch = np.zeros((self.ny, self.nx), dtype=np.uint8)
+        self.core = np.zeros((self.ny, self.nx), dtype=np.uint8)
+
+    @staticmethod
+    def usable(area, step_nm):
+        if np is None:
+            return False
+        nx = (area[2] - area[0]) // step_nm + 1
+        ny = (area[3] - area[1]) // step_nm + 1
+        return nx > 0 and ny > 0 and nx * ny <= _GRID_MAX_CELLS
+
+    def mark(self, r, solid=True):
+        """
+        Record placed rect r. 'solid' = False when it has a narrow-phase
+        polygon: its cells are then not certainly blocked for others.
+        """
+        ax0, ay0, _, _ = self.area
+        s = self.step
+        x0 = r[0] - ax0; x1 = r[2] - ax0
+        y0 = r[1] - ay0; y1 = r[3] - ay0
+        cx0 = max(0, x0 // s); cx1 = min(self.nx - 1, x1 // s)
+        cy0 = max(0, y0 // s); cy1 = min(self.ny - 1, y1 // s)
+        if cx0 <= cx1 and cy0 <= cy1:
+            self.touch[cy0:cy1 + 1, cx0:cx1 + 1] = 1
+        if not solid:
+            return
+        cx0 = max(0, -(-x0 // s)); cx1 = min(self.nx, x1 // s)
+        cy0 = max(0, -(-y0 // s)); cy1 = min(self.ny, y1 // s)
+        if cx0 < cx1 and cy0 < cy1:
+            self.core[cy0:cy1, cx0:cx1] = 1
+
+    @staticmethod
+    def _box_sums(raster, rows, cols, wy, wx):
+        """Sum of every wy x wx box of raster[rows, cols], via a summed-area table."""
+        sub = raster[rows, cols]
+        sat = np.zeros((sub.shape[0] + 1, sub.shape[1] + 1), dtype=np.int32)
+        np.cumsum(sub, axis=0, dtype=np.int32, out=sat[1:, 1:])
+        np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+        return sat[wy:, wx:] - sat[:-wy, wx:] - sat[wy:, :-wx] + sat[:-wy, :-wx]
+
+    def nearest(self, e, tx, ty, fits, placed_rects=None):
+        """
+        Offset (i, j) in steps of the free anchor nearest to (tx, ty) for a
+        rectangle of extent 'e', or None if the area holds none; 'fits(i, j)'
+        is the exact test for undecided cells. With 'placed_rects' (plain
+        rects, no narrow phase) the undecided anchors of a window are decided
+        at once by _lattice_blocked instead. Returns (offset, exact tests,
+        cells evaluated). The window doubles until it holds a free anchor
+        and every closer offset.
+        """
+        ax0, ay0, ax1, ay1 = self.area
+        dx0, dy0, dx1, dy1 = e
+        s = self.step
+        # offsets that keep the rectangle inside the area
+        ilo = -((tx + dx0 - ax0) // s); ihi = (ax1 - tx - dx1) // s
+        jlo = -((ty + dy0 - ay0) // s); jhi = (ay1 - ty - dy1) // s
+        if ilo > ihi or jlo > jhi:
+            return None, 0, 0
+        # cells covered at offset 0, and the rectangle's size in cells
+        c0 = (tx + dx0 - ax0) // s; wx = (tx + dx1 - ax0) // s - c0 + 1
+        r0 = (ty + dy0 - ay0) // s; wy = (ty + dy1 - ay0) // s - r0 + 1
+
+        evaluated = 0
+        tested = 0
+        R = _GRID_WINDOW0
+        while True:
+            i0 = max(ilo, -R); i1 = min(ihi, R)
+            j0 = max(jlo, -R); j1 = min(jhi, R)
+            whole = (i0, i1, j0, j1) == (ilo, ihi, jlo, jhi)
+            hit = None
+            if i0 <= i1 and j0 <= j1:
+                rows = slice(r0 + j0, r0 + j1 + wy)
+                cols = slice(c0 + i0, c0 + i1 + wx)
+                maybe = self._box_sums(self.core, rows, cols, wy, wx) == 0
+                evaluated += maybe.size
+                if maybe.any():
+                    sure = self._box_sums(self.touch, rows, cols, wy, wx) == 0
+                    ii = np.arange(i0, i1 + 1, dtype=np.int64)
+                    jj = np.arange(j0, j1 + 1, dtype=np.int64)
+                    d2 = jj[:, None] ** 2 + ii[None, :] ** 2
+                    w = d2.shape[1]
+                    bound = None
+                    if sure.any():
+                        k = int(np.argmin(np.where(sure, d2, np.iinfo(np.int64).max)))
+                        bound = int(d2.flat[k])
+                        hit = (int(ii[k % w]), int(jj[k // w]))
+                    # undecided anchors closer than the best certain one
+                    undecided = maybe & ~sure
+                    if bound is not None:
+                        undecided &= d2 < bound
+                    if placed_rects is not None:
+                        if undecided.any():
+                            tested += int(undecided.sum())
+                            free = undecided & ~_lattice_blocked(placed_rects, e, tx, ty, s, i0, i1, j0, j1)
+                            if free.any():
+                                k = int(np.argmin(np.where(free, d2, np.iinfo(np.int64).max)))
+                                hit = (int(ii[k % w]), int(jj[k // w]))
+                    else:
+                        ks = np.flatnonzero(undecided)
+                        for k in ks[np.argsort(d2.flat[ks], kind="stable")]:
+                            i = int(ii[k % w]); j = int(jj[k // w])
+                            tested += 1
+                            if fits(i, j):
+                                hit = (i, j)
+                                break
+            if hit is not None:
+                best2 = hit[0] * hit[0] + hit[1] * hit[1]
+                # anything closer lies within isqrt(best2 - 1) steps
+                need = math.isqrt(best2 - 1) if best2 else 0
+                if whole or need <= R:
+                    return hit, tested, evaluated
+                R = need
+                continue
+            if whole:
+                return None, tested, evaluated
+            R *= 2
+
+def _lattice_blocked(placed_rects, e, tx, ty, s, i0, i1, j0, j1):
+    """
+    Exact mask [j - j0, i - i0] of the anchors (tx + i*s, ty + j*s) of a
+    window where a rect of extent 'e' would meet a rect in 'placed_rects'
+    (NumPy, rects only). Each placed rect blocks a box of anchors; the boxes
+    are painted through a 2-D difference array, so the cost is one pass over
+    the placed rects plus one over the window.
+    """
+    q = placed_rects.as_array()
+    # anchors whose rect meets q: q0 - e2 <= x <= q2 - e0 (same in y)
+    li = np.maximum(-((tx + e[2] - q[:, 0]) // s), i0); hi = np.minimum((q[:, 2] - e[0] - tx) // s, i1)
+    lj = np.maximum(-((ty + e[3] - q[:, 1]) // s), j0); hj = np.minimum((q[:, 3] - e[1] - ty) // s, j1)
+    keep = (li <= hi) & (lj <= hj)
+    li = li[keep] - i0; hi = hi[keep] - i0 + 1
+    lj = lj[keep] - j0; hj = hj[keep] - j0 + 1
+    placed_rects.queries += 1
+    placed_rects.tests += len(q)
+    ny = j1 - j0 + 2; nx = i1 - i0 + 2
+    corners = np.concatenate((lj * nx + li, hj * nx + hi, lj * nx + hi, hj * nx + li))
+    signs = np.repeat(np.array([1, 1, -1, -1], dtype=np.int32), len(li))
+    diff = np.bincount(corners, signs, ny * nx).astype(np.int32).reshape(ny, nx)
+    np.cumsum(diff, axis=0, out=diff)
+    np.cumsum(diff, axis=1, out=diff)
+    return diff[:-1, :-1] > 0
+
+def _grid_nearest_place(geom, target, degs, placed_rects, grid, stats=None):
+    """
+    Occupancy-grid counterpart of _closest_nonoverlap_place: the free lattice
+    anchor nearest to 'target' over the whole area, trying each orientation in
+    'degs' (first one wins ties). Marks the grid and the index on success.
+    Returns the pose (x, y, deg) or None.
+    """
+    tx, ty = target
+    s = grid.step
+    area = grid.area
+
+    # target as-is: nothing can be closer
+    bb = _place_ok(geom, tx, ty, degs[0], area, placed_rects)
+    if bb:
+        shape = geom.shape(tx, ty, degs[0])
+        placed_rects.insert(bb, shape)
+        grid.mark(bb, solid=shape is None)
+        if stats is not None: stats.searched(1, 0)
+        return (tx, ty, degs[0])
+
+    best = None  # (dist2, i, j, deg)
+    probes = 2   # target and final exact checks
+    cells = 0
+    for d in degs:
+        def fits(i, j, d=d):
+            return _place_ok(geom, tx + i * s, ty + j * s, d, area, placed_rects) is not None
+        # plain rects: decide a window's undecided anchors in one pass
+        rects = placed_rects if geom.hull(d) is None else None
+        hit, n, c = grid.nearest(geom.extent(d), tx, ty, fits, rects)
+        probes += n
+        cells += c
+        if hit is not None:
+            i, j = hit
+            d2 = i * i + j * j
+            if best is None or d2 < best[0]:
+                best = (d2, i, j, d)
+
+    pose = None
+    ring = 0
+    if best is not None:
+        _, i, j, d = best
+        ring = max(abs(i), abs(j))
+        x = tx + i * s; y = ty + j * s
+        bb = _place_ok(geom, x, y, d, area, placed_rects)
+        if bb:
+            shape = geom.shape(x, y, d)
+            placed_rects.insert(bb, shape)
+            grid.mark(bb, solid=shape is None)
+            pose = (x, y, d)
+    if stats is not None: stats.searched(probes, ring, cells)
+    return pose
+
+# ===================== Refinement ===========================================
+
+_REFINE_CHECK_EVERY = 64     # moves between clock / cancel checks
+_REFINE_T_END = 0.02         # final temperature, in grid steps
+_REFINE_P_SWAP = 0.15        # move mix: swap, pull towards target, rotate, else shift
+_REFINE_P_PULL = 0.45
+_REFINE_P_ROT = 0.10
+
+def _refine_placement(job, poses, budget_s, cancel=None, seed=0):
+    """
+    Simulated annealing over a greedy result, for at most 'budget_s' seconds.
+    Moves: swap two parts' anchors, pull a part towards its target, rotate it
+    (only to orientations whose extents are already known, so no board access
+    happens here) or shift it by a few steps; every move keeps the layout
+    overlap-free and inside the area. The cost, total distance of the anchors
+    from their targets, is updated per move. Returns the best poses seen (a
+    new list, unplaced items stay None), or None if 'cancel' got set.
+    """
+    items = job.items
+    area = job.area
+    step = job.step_nm
+    live = [k for k, pose in enumerate(poses) if pose is not None]
+    if not live:
+        return list(poses)
+    rnd = random.Random(seed)
+
+    index = _RectIndex(job.cell_nm, base=job.obstacles)
+    cur = list(poses)
+    handle = {}
+    owner = {}
+    for k in live:
+        x, y, d = cur[k]
+        g = items[k][1]
+        h = handle[k] = index.insert(g.rect(x, y, d), g.shape(x, y, d))
+        owner[h] = k
+
+    def dist(k, x, y):
+        tx, ty = items[k][2]
+        return math.hypot(x - tx, y - ty)
+
+    def clear(r, shape, *own):
+        return not index.intersects(r, shape, skip=own)
+
+    def move(k, x, y, d, r, shape):
+        index.remove(handle[k]); del owner[handle[k]]
+        h = handle[k] = index.insert(r, shape)
+        owner[h] = k
+        cur[k] = (x, y, d)
+
+    cost = {k: dist(k, cur[k][0], cur[k][1]) for k in live}
+    total = start = sum(cost.values())
+    best, best_total = list(cur), total
+    degs = {k: items[k][1].known_degs() for k in live}
+
+    t0 = time.perf_counter()
+    T0 = max(float(step), total / len(live))
+    T1 = step * _REFINE_T_END
+    T = T0
+    reach = 1
+    moves = accepted = 0
+    while True:
+        if moves % _REFINE_CHECK_EVERY == 0:
+            if cancel is not None and cancel.is_set():
+                return None
+            frac = (time.perf_counter() - t0) / budget_s
+            if frac >= 1.0:
+                break
+            T = T0 * (T1 / T0) ** frac
+            reach = max(1, int(T / step))
+            if total < best_total:
+                best, best_total = list(cur), total
+        moves += 1
+
+        k = rnd.choice(live)
+        geom = items[k][1]
+        tx, ty = items[k][2]
+        x, y, d = cur[k]
+        u = rnd.random()
+
+        if u < _REFINE_P_SWAP:
+            # trade places with a part sitting on our target
+            others = [owner[h] for h, _ in index.query((tx, ty, tx, ty)) if owner.get(h, k) != k]
+            if not others:
+                continue
+            j = others[0]
+            xj, yj, dj = cur[j]
+            rk = geom.rect(xj, yj, d)
+            rj = items[j][1].rect(x, y, dj)
+            if not (_inside(rk, area) and _inside(rj, area)):
+                continue
+            sk = geom.shape(xj, yj, d)
+            sj = items[j][1].shape(x, y, dj)
+            if _rects_intersect(rk, rj) and (sk is None or sj is None or _polys_intersect(sk, sj)):
+                continue
+            hk, hj = handle[k], handle[j]
+            if not (clear(rk, sk, hk, hj) and clear(rj, sj, hk, hj)):
+                continue
+            delta = dist(k, xj, yj) + dist(j, x, y) - cost[k] - cost[j]
+            if delta > 0 and rnd.random() >= math.exp(-delta / T):
+                continue
+            move(k, xj, yj, d, rk, sk); move(j, x, y, dj, rj, sj)
+            cost[k] = dist(k, xj, yj)
+            cost[j] = dist(j, x, y)
+            total += delta
+            accepted += 1
+            continue
+
+        if u < _REFINE_P_SWAP + _REFINE_P_PULL:
+            f = rnd.random()
+            nx = tx + int(round((x - tx) * f / step)) * step
+            ny = ty + int(round((y - ty) * f / step)) * step
+            nd = d
+        elif u < _REFINE_P_SWAP + _REFINE_P_PULL + _REFINE_P_ROT and len(degs[k]) > 1:
+            nx, ny = x, y
+            nd = rnd.choice([o for o in degs[k] if o != d])
+        else:
+            nx = x + rnd.randint(-reach, reach) * step
+            ny = y + rnd.randint(-reach, reach) * step
+            nd = d
+        if (nx, ny, nd) == (x, y, d):
+            continue
+        r = geom.rect(nx, ny, nd)
+        if not _inside(r, area):
+            continue
+        sh = geom.shape(nx, ny, nd)
+        if not clear(r, sh, handle[k]):
+            continue
+        delta = dist(k, nx, ny) - cost[k]
+        if delta > 0 and rnd.random() >= math.exp(-delta / T):
+            continue
+        move(k, nx, ny, nd, r, sh)
+        cost[k] += delta
+        total += delta
+        accepted += 1
+
+    if total < best_total:
+        best, best_total = list(cur), total
+    job.stats.refine = dict(moves=moves, accepted=accepted,
+                            before_mm=round(_nm_to_mm(start), 3), after_mm=round(_nm_to_mm(best_total), 3))
+    return best
+
+# ===================== Cluster placement ====================================
+
+_CLUSTER_MAX_NET_FPS = 12   # nets joining more footprints (GND, rails, buses) do not cluster
+_CLUSTER_MAX_FPS = 32       # net clusters stop growing at this many footprints
+_CLUSTER_PACK_TRIES = 3     # local packing attempts, each with twice the room
+
+def _net_clusters(nets, max_fps=_CLUSTER_MAX_NET_FPS):
+    """
+    {ref: cluster} from {ref: iterable of net names}: footprints sharing a
+    net end up in one cluster, ignoring nets on more than 'max_fps'
+    footprints. Nets are joined smallest first and never into a cluster of
+    more than _CLUSTER_MAX_FPS. Footprints without any such net are left out.
+    """
+    on = {}
+    for ref, names in nets.items():
+        for net in set(names):
+            if net:
+                on.setdefault(net, []).append(ref)
+    parent = {}
+    size = {}
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for net in sorted(on, key=lambda n: (len(on[n]), n)):
+        refs = on[net]
+        if len(refs) < 2 or len(refs) > max_fps:
+            continue
+        for ref in refs:
+            if ref not in parent:
+                parent[ref] = ref; size[ref] = 1
+        root = find(refs[0])
+        for ref in refs[1:]:
+            other = find(ref)
+            if other != root and size[root] + size[other] <= _CLUSTER_MAX_FPS:
+                parent[other] = root
+                size[root] += size.pop(other)
+    return {ref: find(ref) for ref in parent}
+
+def _pack_cluster(job, members):
+    """
+    Pack item numbers 'members' of 'job' around their targets, in local
+    coordinates centred on the targets' centroid and with no obstacles,
+    biggest first; targets spread wider than the parts need are drawn in
+    first.
+    Returns ((cx, cy), {k: (dx, dy, deg)}, block rect around the centroid,
+    stats); members that did not fit even after _CLUSTER_PACK_TRIES tries
+    are missing from the offsets.
+    """
+    items = job.items
+    cx = sum(items[k][2][0] for k in members) // len(members)
+    cy = sum(items[k][2][1] for k in members) // len(members)
+    areas = []
+    biggest = 0
+    for k in members:
+        e = items[k][1].extent(items[k][3])
+        areas.append((e[2] - e[0]) * (e[3] - e[1]))
+        biggest = max(biggest, e[2] - e[0], e[3] - e[1])
+    size = sum(areas)
+    # keep the members' relative layout, but drawn in to the side they
+    # would fill completely: the search then packs them edge to edge
+    spread = max(max(abs(items[k][2][0] - cx), abs(items[k][2][1] - cy)) for k in members)
+    f = min(1.0, math.sqrt(size) / max(1, 2 * spread))
+    local = [(items[k][0], items[k][1], (int((items[k][2][0] - cx) * f), int((items[k][2][1] - cy) * f)),
+              items[k][3]) for k in members]
+    room = int(math.sqrt(2 * size)) + biggest
+    # biggest first: the small parts then fill the gaps around them
+    order = sorted(range(len(local)), key=lambda n: -areas[n])
+    stats = _PlacementStats()
+    for _ in range(_CLUSTER_PACK_TRIES):
+        sub = _PlacementJob(job.P, local, (-room, -room, room, room), job.step_nm, job.cell_nm, stats)
+        poses = [None] * len(local)
+        _greedy_placement(sub, order, _RectIndex(job.cell_nm), poses, [None] * len(local))
+        if all(pose is not None for pose in poses):
+            break
+        room *= 2
+    offsets = {}
+    block = None
+    for k, (_, geom, _, _), pose in zip(members, local, poses):
+        if pose is None:
+            continue
+        offsets[k] = pose
+        r = geom.rect(*pose)
+        block = r if block is None else (min(block[0], r[0]), min(block[1], r[1]),
+                                          max(block[2], r[2]), max(block[3], r[3]))
+    return (cx, cy), offsets, block, stats
+
+def _anchor_blocks(blocks, anchors, area):
+    """
+    Retarget the blocks whose sheet has an anchor: the anchors' bounding box
+    is scaled, keeping its aspect, to fit the area and centred in it.
+    """
+    pts = [anchors[b[4]] for b in blocks if anchors.get(b[4])]
+    if not pts:
+        return
+    minx = min(p[0] for p in pts); maxx = max(p[0] for p in pts)
+    miny = min(p[1] for p in pts); maxy = max(p[1] for p in pts)
+    w = area[2] - area[0]
+    h = area[3] - area[1]
+    scale = min(w / max(1e-6, maxx - minx), h / max(1e-6, maxy - miny))
+    mx = (area[0] + area[2]) // 2
+    my = (area[1] + area[3]) // 2
+    for n, (first, centre, offsets, block, key) in enumerate(blocks):
+        a = anchors.get(key)
+        if a:
+            centre = (mx + int((a[0] - (minx + maxx) / 2) * scale), my + int((a[1] - (miny + maxy) / 2) * scale))
+            blocks[n] = (first, centre, offsets, block, key)
+
+def _cluster_placement(job, cancel=None):
+    """
+    Cluster mode: items are grouped by P["cluster"] ("sheet": job.sheets,
+    "nets": job.nets), each group is packed locally into a block
+    (_pack_cluster) and the blocks are placed, as single rects, at the
+    centroids of their members' targets; sheet blocks go instead to where
+    their sheet sits on the root page (job.anchors), scaled to fill the
+    area. The placed blocks then give way to their members' own rects, so
+    the gaps inside a block stay usable: members of blocks that find no
+    room, or that did not fit into their own block, and ungrouped items are
+    placed one by one among them. Returns the poses, or None if 'cancel'
+    got set.
+    """
+    P = job.P
+    stats = job.stats
+    groups = (job.sheets if P["cluster"] == "sheet" else job.nets) or {}
+    clusters = {}
+    loose = []
+    for k, (ref, _, _, _) in enumerate(job.items):
+        key = groups.get(ref)
+        if key is None:
+            loose.append(k)
+        else:
+            clusters.setdefault(key, []).append(k)  # first member = earliest in the planned order
+
+    blocks = []
+    for key, members in clusters.items():
+        if len(members) < 2:
+            loose.extend(members)
+            continue
+        if cancel is not None and cancel.is_set():
+            return None
+        centre, offsets, block, packed = _pack_cluster(job, members)
+        for name in ("probes", "tests", "cells"):
+            setattr(stats, name, getattr(stats, name) + getattr(packed, name))
+        loose.extend(k for k in members if k not in offsets)
+        if offsets:
+            blocks.append((members[0], centre, offsets, block, key))
+
+    if P["cluster"] == "sheet" and job.anchors:
+        _anchor_blocks(blocks, job.anchors, job.area)
+    # blocks in the planned order of their first member
+    blocks.sort(key=lambda b: b[0])
+    items = [("#%d" % n, _RectGeometry(bbox=block), centre, None)
+             for n, (_, centre, _, block, _) in enumerate(blocks)]
+    macro = _PlacementJob(dict(P, optimise=False), items, job.area, job.step_nm, job.cell_nm,
+                          _PlacementStats(), job.obstacles)
+    where = [None] * len(items)
+    if not _greedy_placement(macro, range(len(items)), _RectIndex(job.cell_nm, base=job.obstacles),
+                             where, [None] * len(items), cancel):
+        return None
+    for name in ("probes", "tests", "cells"):
+        setattr(stats, name, getattr(stats, name) + getattr(macro.stats, name))
+
+    poses = [None] * len(job.items)
+    placed_rects = _RectIndex(job.cell_nm, base=job.obstacles)
+    for (_, _, offsets, _, _), pose in zip(blocks, where):
+        if pose is None:
+            loose.extend(offsets)
+            continue
+        for k, (x, y, d) in offsets.items():
+            x += pose[0]; y += pose[1]
+            geom = job.items[k][1]
+            placed_rects.insert(geom.rect(x, y, d), geom.shape(x, y, d))
+            poses[k] = (x, y, d)
+    # the rest, one by one, among the members
+    if not _greedy_placement(job, sorted(loose), placed_rects, poses, [None] * len(poses), cancel):
+        return None
+    stats.placed = sum(1 for pose in poses if pose is not None)
+    stats.skipped = len(poses) - stats.placed
+    stats.clusters = dict(mode=P["cluster"], blocks=len(blocks),
+                          placed=sum(1 for pose in where if pose is not None), loose=len(loose))
+    return poses
+
+# ===================== Instrumentation ======================================
+
+# JSON-lines run log written next to the board when asked for
+_STATS_NAME = "p2b-stats.jsonl"
+
+class _PlacementStats:
+    """
+    Counters and phase timings of one placement run, plus one record per
+    footprint (probes, rectangle tests, ring reached, time) to find the parts
+    that dominate the cost.
+    """
+
+    def __init__(self):
+        self.phases = {}        # name -> seconds, in run order
+        self.probes = 0         # candidate poses tested
+        self.bbox_reads = 0     # footprint extents computed
+        self.tests = 0          # rectangle intersection tests
+        self.cells = 0          # occupancy-grid cells evaluated
+        self.placed = 0
+        self.skipped = 0
+        self.moved = None       # footprints actually changed on the board, once committed
+        self.kept = None        # footprints kept from the last layout, in an incremental run
+        self.footprints = []    # [{"ref", "placed", "probes", "tests", "ring", "ms"}]
+        self.refine = None      # {"moves", "accepted", "before_mm", "after_mm"} if refined
+        self.starts = None      # [{"order", "seed", "placed", "skipped", "displacement_mm", "best"}], multi-start
+        self.clusters = None    # {"mode", "blocks", "placed", "loose"} in cluster mode
+        self.memo = False       # poses reused from an earlier run with the same settings
+        self._probes = 0        # of the footprint being searched
+        self._ring = 0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t0
+
+    def searched(self, probes, ring, cells=0):
+        """Called by the search for the footprint in progress."""
+        self._probes = probes
+        self._ring = ring
+        self.cells += cells
+
+    def footprint(self, ref, placed, tests, seconds):
+        self.probes += self._probes
+        self.tests += tests
+        if placed:
+            self.placed += 1
+        else:
+            self.skipped += 1
+        self.footprints.append(dict(ref=ref, placed=placed, probes=self._probes, tests=tests,
+                                    ring=self._ring, ms=round(seconds * 1000.0, 3)))
+        self._probes = 0; self._ring = 0
+
+    def worst(self, n=3):
+        return sorted(self.footprints, key=lambda f: -f["ms"])[:n]
+
+    def summary(self):
+        lines = ["Placed %d, skipped %d." % (self.placed, self.skipped)]
+        if self.moved is not None:
+            lines[0] = "Placed %d (%d moved), skipped %d." % (self.placed, self.moved, self.skipped)
+        if self.kept is not None:
+            lines.append("Incremental: kept %d, re-placed %d." % (self.kept, len(self.footprints)))
+        if self.memo:
+            lines.append("Reused the layout computed earlier for these settings.")
+        if self.phases:
+            lines.append("  ".join("%s %.3f s" % kv for kv in self.phases.items()))
+        lines.append("%d probes, %d rect tests, %d grid cells, %d bbox reads" % (
+            self.probes, self.tests, self.cells, self.bbox_reads))
+        if self.starts:
+            best = [st for st in self.starts if st["best"]][0]
+            lines.append("Multi-start: %s order won of %d (%d skipped, %.1f mm total displacement)" % (
+                best["order"], len(self.starts), best["skipped"], best["displacement_mm"]))
+        if self.clusters:
+            lines.append("Clusters by %(mode)s: %(placed)d of %(blocks)d blocks placed, "
+                         "%(loose)d parts placed singly" % self.clusters)
+            if self.clusters.get("ignored"):
+                lines.append("Not used with clusters: " + ", ".join(self.clusters["ignored"]))
+        if self.refine:
+            lines.append("Refined: total displacement %(before_mm).1f -> %(after_mm).1f mm "
+                         "(%(accepted)d of %(moves)d moves)" % self.refine)
+        worst = [f for f in self.worst() if f["probes"] > 1]
+        if worst:
+            lines.append("Slowest: " + ", ".join(
+                "%s (%d probes, ring %d, %.1f ms)" % (f["ref"], f["probes"], f["ring"], f["ms"]) for f in worst))
+        return "\n".join(lines)
+
+    def write_jsonl(self, path, **extra):
+        """Append one "run" line and one line per footprint to 'path'."""
+        run = dict(kind="run", time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   placed=self.placed, skipped=self.skipped, moved=self.moved, probes=self.probes,
+                   tests=self.tests, cells=self.cells, bbox_reads=self.bbox_reads,
+                   phases={k: round(v, 6) for k, v in self.phases.items()})
+        if self.refine:
+            run["refine"] = self.refine
+        if self.kept is not None:
+            run["kept"] = self.kept
+        if self.starts:
+            run["starts"] = self.starts
+        if self.clusters:
+            run["clusters"] = self.clusters
+        if self.memo:
+            run["memo"] = True
+        run.update(extra)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+            for rec in self.footprints:
+                f.write(json.dumps(dict(rec, kind="footprint", time=run["time"])) + "\n")
+
+class _PlacementJob:
+    """
+    Detached snapshot of one placement run: the ordered footprints with their
+    targets and prefilled geometry, plus the area and grid. Built by
+    _plan_placement (on the UI thread in the plugin); _compute_placement
+    only reads it.
+    """
+
+    def __init__(self, P, items, area, step_nm, cell_nm, stats=None, obstacles=None):
+        self.P = P
+        self.items = items  # [(ref, geom, (tx, ty), deg), ...] in placement order
+        self.area = area
+        self.step_nm = step_nm
+        self.cell_nm = cell_nm
+        self.stats = stats if stats is not None else _PlacementStats()
+        self.obstacles = obstacles  # _RectIndex of static obstacles, or None
+        self.sheets = None          # {ref: sheet} for the per-sheet ordering, if known
+        self.nets = None            # {ref: net cluster} (see _net_clusters), if known
+        self.anchors = None         # {sheet: [x, y] on the root page} (see _SchematicSymbols.anchors)
+
+def _plan_placement(symbols, footprints, P, stats=None, obstacles=None, sheets=None, nets=None,
+                    anchors=None):
+    """
+    Order the symbols that have a movable footprint and map them to targets.
+    'symbols' is {ref: (x_mm, y_mm, rot)}, 'footprints' {ref: geometry} for
+    the footprints allowed to move, 'obstacles' an optional _RectIndex of
+    what they must not overlap besides each other, 'sheets' an optional
+    {ref: sheet} with their 'anchors' (see _SchematicSymbols) and 'nets' an
+    optional {ref: cluster} (see _net_clusters). Returns a _PlacementJob,
+    or None if no symbol has a footprint.
+    """
+    stats = stats if stats is not None else _PlacementStats()
+    with stats.phase("ordering"):
+        job = _order_placement(symbols, footprints, P)
+    if job is None:
+        return None
+    job.stats = stats
+    job.obstacles = obstacles
+    job.sheets = sheets
+    job.nets = nets
+    job.anchors = anchors
+    with stats.phase("geometry"):
+        optimise = P.get("optimise", True)
+        rot_step_deg = P.get("rot_step_deg", 10.0)
+        for _, geom, _, deg in job.items:
+            if not P["avoid_collisions"]:
+                continue
+            if optimise and deg is not None:
+                geom.prefill((deg, deg + rot_step_deg, deg - rot_step_deg))
+            else:
+                geom.prefill((deg,))
+            stats.bbox_reads += geom.reads
+    return job
+
+def _order_placement(symbols, footprints, P):
+    table = _SymbolTable.of(symbols)
+    if not len(table):
+        return None
+    rows = [i for i, ref in enumerate(table.refs) if ref in footprints]
+    if not rows:
+        return None
+    if np is not None:
+        ordered, targets = _order_targets_np(table, rows, P)
+    else:
+        ordered, targets = _order_targets(table, rows, P)
+
+    # ---- geometry & area ----------------------------------------------------
+    x0_nm = _mm_to_nm(P["x0"])
+    y0_nm = _mm_to_nm(P["y0"])
+    w_nm  = _mm_to_nm(P["w"])
+    h_nm  = _mm_to_nm(P["h"])
+    step_nm = max(1, _mm_to_nm(P["step_mm"]))  # avoid zero
+
+    area = (x0_nm, y0_nm, x0_nm + w_nm, y0_nm + h_nm)
+    cell_nm = _index_cell_nm(step_nm)
+
+    # ---- per-footprint targets (seed-first, then by distance) --------------
+    items = []
+    for i, target in zip(ordered, targets):
+        ref = table.refs[i]
+        geom = footprints[ref]
+        rot = table.rot[i]
+
+        # rotation first (affects bbox), if requested and present
+        if P["use_rotation"] and rot == rot and geom.deg is not None:
+            deg = rot
+        else:
+            deg = geom.deg
+        items.append((ref, geom, target, deg))
+
+    return _PlacementJob(P, items, area, step_nm, cell_nm)
+
+def _order_targets(table, rows, P):
+    """
+    Placement order of the table rows in 'rows' (seed = top-left symbol,
+    then by distance from it) and their targets in nm, as two lists.
+    """
+    # ---- schematic bbox for (auto) scale -----------------------------------
+    xs, ys, refs = table.x, table.y, table.refs
+    minx, maxx = min(xs), max(xs)
+    miny, maxy = min(ys), max(ys)
+    width  = max(1e-6, maxx - minx)
+    height = max(1e-6, maxy - miny)
+
+    scale = (min(P["w"] / width, P["h"] / height)) if P["scale"] is None else P["scale"]
+
+    # ---- ordering: seed = top-left (min y, then min x); others by distance ---
+    seed = min(rows, key=lambda i: (ys[i], xs[i], refs[i]))
+    sx0, sy0 = xs[seed], ys[seed]
+
+    def dist(i):  # squared: rounds the same here and in _order_targets_np
+        dx = xs[i] - sx0
+        dy = ys[i] - sy0
+        return dx * dx + dy * dy
+
+    ordered = [seed] + sorted([i for i in rows if i != seed], key=lambda i: (dist(i), refs[i]))
+
+    # map normalised schematic coords into the PCB area
+    targets = [(_mm_to_nm(P["x0"] + (xs[i] - minx) * scale), _mm_to_nm(P["y0"] + (ys[i] - miny) * scale))
+               for i in ordered]
+    return ordered, targets
+
+def _order_targets_np(table, rows, P):
+    """_order_targets on the NumPy columns: same order and targets, in bulk."""
+    xs, ys, _ = table.columns()
+    refs = table.refs
+    minx, maxx = float(xs.min()), float(xs.max())
+    miny, maxy = float(ys.min()), float(ys.max())
+    width  = max(1e-6, maxx - minx)
+    height = max(1e-6, maxy - miny)
+
+    scale = (min(P["w"] / width, P["h"] / height)) if P["scale"] is None else P["scale"]
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cx = xs[rows]; cy = ys[rows]
+    top = rows[(cy == cy.min())]
+    top = top[xs[top] == xs[top].min()]
+    seed = int(min(top, key=lambda i: refs[i]))
+
+    rest = rows[rows != seed]
+    dx = xs[rest] - xs[seed]
+    dy = ys[rest] - ys[seed]
+    d = dx * dx + dy * dy
+    by = np.argsort(d, kind="stable")
+    rest = rest[by].tolist()
+    d = d[by]
+    # equal distances: by reference, as the scalar path does
+    ties = np.flatnonzero(d[1:] == d[:-1])
+    if len(ties):
+        start = ties[0]; end = start + 1
+        for t in ties[1:].tolist() + [None]:
+            if t is not None and t <= end:
+                end = t + 1
+                continue
+            rest[start:end + 1] = sorted(rest[start:end + 1], key=lambda i: refs[i])
+            if t is not None:
+                start = t; end = t + 1
+    ordered = [seed] + rest
+
+    o = np.asarray(ordered, dtype=np.int64)
+    tx = ((P["x0"] + (xs[o] - minx) * scale) * _NM_PER_MM).astype(np.int64)
+    ty = ((P["y0"] + (ys[o] - miny) * scale) * _NM_PER_MM).astype(np.int64)
+    return ordered, list(zip(tx.tolist(), ty.tolist()))
+
+def _same_deg(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    return abs((a - b + 180.0) % 360.0 - 180.0) < 1e-6
+
+class _PlacementSession:
+    """
+    Layout of the last run, kept between Applies for incremental
+    re-placement: per reference its target, orientation and pose, plus the
+    index of the placed rects. resume() keeps the entries still valid for a
+    new job and removes the others from the index; only those then get
+    searched again. Runs sharing a session serialise on 'lock'.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.key = None
+        self.layout = {}   # ref -> (target, deg, pose, handle) of the last run
+        self.obstacles = None
+        self.index = None  # _RectIndex of the last run's rects, None if it did not finish
+
+    @staticmethod
+    def _key(job):
+        """What the whole layout depends on; any change means a full run."""
+        P = job.P
+        return (job.area, job.step_nm, job.cell_nm, P["avoid_collisions"],
+                P.get("search", "grid"), P.get("collision", "bbox"),
+                bool(P.get("optimise", True)), P.get("rot_step_deg", 10.0))
+
+    def resume(self, job):
+        """
+        (index, poses, handles, todo, skipped) to continue from the last
+        layout: 'poses' and 'handles' hold the kept pose and index handle per
+        item (None for the others), 'todo' the item numbers to place again:
+        new references, changed targets or orientations, footprints moved on
+        the board since, and kept ones that now hit an obstacle. Footprints
+        skipped last time are retried only if space may have been freed,
+        else they stay skipped (counted in 'skipped'). None if the last
+        layout does not apply (first run, other parameters, or a cancelled
+        run).
+        """
+        if self.index is None or self.key != self._key(job):
+            return None
+        index = self.index
+        index.base = job.obstacles
+        poses = [None] * len(job.items)
+        handles = [None] * len(job.items)
+        todo = []
+        skipped = []
+        freed = job.obstacles is not self.obstacles
+        left = dict(self.layout)
+        for k, (ref, geom, target, deg) in enumerate(job.items):
+            e = left.pop(ref, None)
+            if e is not None and e[3] is None:
+                if e[2] is None and e[0] == target and _same_deg(e[1], deg):
+                    skipped.append(k)  # still has no room, unless some was freed
+                    continue
+            elif e is not None:
+                t, d, pose, h = e
+                if (t == target and _same_deg(d, deg) and geom.pos == (pose[0], pose[1])
+                        and (pose[2] is None or _same_deg(geom.deg, pose[2]))):
+                    r = geom.rect(*pose)
+                    if r == index._rects[h] and not (job.obstacles is not None and job.obstacles.intersects(r)):
+                        poses[k] = pose
+                        handles[k] = h
+                        continue
+                index.remove(h)
+                freed = True
+            todo.append(k)
+        for e in left.values():  # gone, locked or deselected since
+            if e[3] is not None:
+                index.remove(e[3])
+                freed = True
+        if freed:
+            todo = sorted(todo + skipped)
+            skipped = []
+        return index, poses, handles, todo, len(skipped)
+
+    def record(self, job, poses, handles, index):
+        self.key = self._key(job)
+        self.index = index
+        self.obstacles = job.obstacles
+        self.layout = {ref: (target, deg, pose, h)
+                       for (ref, _, target, deg), pose, h in zip(job.items, poses, handles)}
+
+_MEMO_SIZE = 16  # layouts kept by a _PlacementMemo
+# parameters that do not shape the layout (the plugin's own bookkeeping included)
+_MEMO_IGNORED = ("incremental", "parse_workers", "write_stats", "stats_path", "memo_scope")
+
+class _PlacementMemo:
+    """
+    Bounded LRU of finished layouts while the panel is open, so going back to
+    settings tried before re-applies their poses instead of searching again.
+    Entries are keyed by the parameters that shape the layout and belong to
+    one 'scope' (schematic and board fingerprints, P["memo_scope"] of the
+    job): a job with another scope drops them all. Runs whose result depends
+    on the previous layout (incremental ones) are neither looked up nor kept.
+    """
+
+    def __init__(self, size=_MEMO_SIZE):
+        self.size = size
+        self.scope = None
+        self._layouts = {}  # key -> {ref: pose}, least recently used first
+
+    @staticmethod
+    def _key(P):
+        return tuple(sorted((k, v) for k, v in P.items() if k not in _MEMO_IGNORED))
+
+    def get(self, job):
+        """Poses for 'job' (in item order) from an earlier run, or None."""
+        if job.P.get("memo_scope") != self.scope:
+            self._layouts.clear()
+            self.scope = job.P.get("memo_scope")
+            return None
+        if job.P.get("incremental"):
+            return None
+        key = self._key(job.P)
+        layout = self._layouts.pop(key, None)
+        if layout is None:
+            return None
+        self._layouts[key] = layout  # most recently used
+        if len(layout) != len(job.items) or any(ref not in layout for ref, _, _, _ in job.items):
+            return None
+        return [layout[ref] for ref, _, _, _ in job.items]
+
+    def put(self, job, poses, scope):
+        """
+        Keep the poses of a finished 'job' and move to 'scope', the
+        fingerprints once they are on the board, so writing a layout does not
+        count as a board change. Results of a job planned in another scope
+        (the board or schematic changed while it ran) are not kept.
+        """
+        if job.P.get("memo_scope") != self.scope:
+            return
+        if not job.P.get("incremental"):
+            key = self._key(job.P)
+            self._layouts.pop(key, None)
+            self._layouts[key] = {ref: pose for (ref, _, _, _), pose in zip(job.items, poses)}
+            while len(self._layouts) > self.size:
+                del self._layouts[next(iter(self._layouts))]
+        self.scope = scope
+
+def _compute_placement(job, cancel=None, session=None):
+    """
+    Run the search for every item of 'job' without touching the board.
+    Returns a pose (x, y, deg) or None per item, or None if 'cancel' (a
+    threading.Event) got set on the way. With P["refine_s"] > 0 the greedy
+    result is then refined for up to that many seconds. Counters go to
+    job.stats. With a _PlacementSession, only what changed since its last
+    layout is searched again (see _PlacementSession.resume) and the session
+    then holds this run's layout.
+    """
+    if session is None:
+        return _run_placement(job, cancel)
+    with session.lock:
+        return _run_placement(job, cancel, session)
+
+def _run_placement(job, cancel=None, session=None):
+    P = job.P
+    stats = job.stats
+    resumed = session.resume(job) if session is not None else None
+    if resumed is not None:
+        placed_rects, poses, handles, todo, skipped = resumed
+        stats.kept = len(job.items) - len(todo) - skipped
+        stats.placed += stats.kept
+        stats.skipped += skipped
+    else:
+        placed_rects = _RectIndex(job.cell_nm, base=job.obstacles)
+        poses = [None] * len(job.items)
+        handles = [None] * len(job.items)
+        todo = range(len(job.items))
+    if session is not None:
+        session.index = None  # until this run completes
+    clustered = resumed is None and P.get("cluster", "off") != "off" and P["avoid_collisions"]
+    with stats.phase("search"):
+        if clustered:
+            poses = _cluster_placement(job, cancel)
+            placed_rects = None  # holds blocks, not footprints
+        elif resumed is None and P.get("starts", 1) > 1 and P["avoid_collisions"]:
+            poses = _multistart_placement(job, cancel)
+            placed_rects = None  # each start had its own
+        elif not _greedy_placement(job, todo, placed_rects, poses, handles, cancel):
+            return None
+    if poses is None:
+        return None
+    if clustered and stats.clusters is not None:
+        # refining towards each symbol's own target would pull the blocks apart,
+        # and the blocks are placed in one order only
+        stats.clusters["ignored"] = [name for name, on in (("refine", P.get("refine_s", 0.0) > 0),
+                                                           ("starts", P.get("starts", 1) > 1)) if on]
+
+    refine_s = P.get("refine_s", 0.0)
+    if refine_s > 0 and P["avoid_collisions"] and resumed is None and not clustered:
+        with stats.phase("refine"):
+            poses = _refine_placement(job, poses, refine_s, cancel)
+        if poses is None:
+            return None
+        placed_rects = None  # the refined poses are not in it
+    if session is not None:
+        if placed_rects is None:
+            placed_rects = _RectIndex(job.cell_nm, base=job.obstacles)
+            for k, ((_, geom, _, _), pose) in enumerate(zip(job.items, poses)):
+                if pose is not None:
+                    handles[k] = placed_rects.insert(geom.rect(*pose), geom.shape(*pose))
+        session.record(job, poses, handles, placed_rects)
+    return poses
+
+def _greedy_placement(job, todo, placed_rects, poses, handles, cancel=None):
+    """
+    Place the items numbered in 'todo', in that order, each at the free spot
+    nearest its target given everything already in 'placed_rects'. Fills
+    'poses' and 'handles' (index handle of the placed rect) in place;
+    returns False if 'cancel' got set on the way.
+    """
+    P = job.P
+    stats = job.stats
+    optimise = P.get("optimise", True)
+    rot_step_deg = P.get("rot_step_deg", 10.0)
+    grid = None
+    if P["avoid_collisions"] and P.get("search", "grid") == "grid" and _OccupancyGrid.usable(job.area, job.step_nm):
+        grid = _OccupancyGrid(job.area, job.step_nm)
+        for r in job.obstacles or ():
+            grid.mark(r)
+        for r, shape in placed_rects.items():
+            grid.mark(r, solid=shape is None)
+    for k in todo:
+        ref, geom, target, deg = job.items[k]
+        if cancel is not None and cancel.is_set():
+            return False
+        t0 = time.perf_counter()
+        n0 = placed_rects.tests
+        if grid is not None:
+            if optimise and deg is not None:
+                degs = (deg, deg + rot_step_deg, deg - rot_step_deg)
+            else:
+                degs = (deg,)
+            pose = _grid_nearest_place(geom, target, degs, placed_rects, grid, stats)
+        elif P["avoid_collisions"]:
+            pose = _closest_nonoverlap_place(
+                geom=geom,
+                target=target,
+                deg=deg,
+                placed_rects=placed_rects,
+                step_nm=job.step_nm,
+                area=job.area,
+                optimise=optimise,
+                rot_step_deg=rot_step_deg,
+                stats=stats
+            )
+        else:
+            pose = (target[0], target[1], deg)
+        stats.footprint(ref, pose is not None, placed_rects.tests - n0, time.perf_counter() - t0)
+        poses[k] = pose
+        if pose is not None and P["avoid_collisions"]:
+            handles[k] = placed_rects.last
+    return True
+
+# ===================== Multi-start ==========================================
+
+# Orderings tried by a multi-start run, in this order; further starts are
+# random orders
+_ORDERINGS = ("distance", "size", "density", "sheet")
+
+def _start_order(job, strategy, seed=0):
+    """
+    Item numbers of 'job' in the order 'strategy' places them:
+      distance  the planned order (top-left seed, then distance from it)
+      size      largest footprint first
+      density   items whose targets sit in the most crowded index cells first
+      sheet     one schematic sheet after the other, sheets in planned order
+      random    shuffled with 'seed'
+    Ties keep the planned order.
+    """
+    items = job.items
+    n = len(items)
+    if strategy == "random":
+        order = list(range(n))
+        random.Random(seed).shuffle(order)
+        return order
+
+    def area(k):
+        e = items[k][1].extent(items[k][3])
+        return (e[2] - e[0]) * (e[3] - e[1])
+
+    if strategy == "size":
+        return sorted(range(n), key=lambda k: (-area(k), k))
+    if strategy == "density":
+        c = job.cell_nm
+        cell = [(t[0] // c, t[1] // c) for _, _, t, _ in items]
+        load = {}
+        for k in range(n):
+            load[cell[k]] = load.get(cell[k], 0) + area(k)
+        return sorted(range(n), key=lambda k: (-load[cell[k]], k))
+    if strategy == "sheet":
+        sheets = job.sheets or {}
+        first = {}
+        for k, (ref, _, _, _) in enumerate(items):
+            first.setdefault(sheets.get(ref), k)
+        return sorted(range(n), key=lambda k: (first[sheets.get(items[k][0])], k))
+    return list(range(n))
+
+def _run_start(job, strategy, seed=0):
+    """
+    One greedy pass of a multi-start run over detached 'job' (may run in a
+    worker process). Returns (poses in job order, displacement in nm, stats).
+    """
+    poses = [None] * len(job.items)
+    order = _start_order(job, strategy, seed)
+    _greedy_placement(job, order, _RectIndex(job.cell_nm, base=job.obstacles), poses, [None] * len(poses))
+    total = 0.0
+    for (_, _, (tx, ty), _), pose in zip(job.items, poses):
+        if pose is not None:
+            total += math.hypot(pose[0] - tx, pose[1] - ty)
+    return poses, total, job.stats
+
+def _multistart_placement(job, cancel=None):
+    """
+    Greedy passes over P["starts"] orderings (see _ORDERINGS; random orders
+    seeded from P["seed"] after those), in a process pool (see _process_pool)
+    when there are cores to spare. Keeps the layout with the fewest skipped
+    parts, then the lowest total displacement; its counters become
+    job.stats'. Returns the winner's poses, or None if 'cancel' got set.
+    """
+    P = job.P
+    starts = []
+    for i in range(P["starts"]):
+        strategy = _ORDERINGS[i] if i < len(_ORDERINGS) else "random"
+        if strategy == "sheet" and not job.sheets:
+            strategy = "random"
+        starts.append((strategy, P.get("seed", 0) + i))
+    # each start gets its own stats, and geometry that pickles without pcbnew
+    items = [(ref, geom.detached(), target, deg) for ref, geom, target, deg in job.items]
+    def snapshot():
+        snap = _PlacementJob(P, items, job.area, job.step_nm, job.cell_nm, obstacles=job.obstacles)
+        snap.sheets = job.sheets
+        return snap
+
+    results = None
+    workers = min(len(starts), os.cpu_count() or 1)
+    pool = None
+    if workers > 1:
+        try:
+            pool = _process_pool(workers)
+        except Exception:
+            pool = None  # no usable subprocesses here: run the starts serially
+    if pool is not None:
+        try:
+            futures = [pool.submit(_run_start, snapshot(), strategy, seed) for strategy, seed in starts]
+            pending = set(futures)
+            while pending:
+                if cancel is not None and cancel.is_set():
+                    return None
+                _, pending = concurrent.futures.wait(pending, timeout=0.1)
+            results = [f.result() for f in futures]
+        except Exception:
+            results = None  # the workers did not start or died: fall back to serial
+        finally:
+            # a cancelled run does not wait for the starts still going
+            pool.shutdown(wait=results is not None, cancel_futures=True)
+    if results is None:
+        results = []
+        for strategy, seed in starts:
+            if cancel is not None and cancel.is_set():
+                return None
+            results.append(_run_start(snapshot(), strategy, seed))
+
+    best = min(range(len(starts)), key=lambda i: (results[i][2].skipped, results[i][1], i))
+    poses, _, won = results[best]
+    stats = job.stats
+    for name in ("probes", "tests", "cells", "placed", "skipped"):
+        setattr(stats, name, getattr(stats, name) + getattr(won, name))
+    stats.footprints.extend(won.footprints)
+    stats.starts = [dict(order=strategy, seed=seed, placed=r[2].placed, skipped=r[2].skipped,
+                         displacement_mm=round(_nm_to_mm(r[1]), 3), best=(i == best))
+                    for i, ((strategy, seed), r) in enumerate(zip(starts, results))]
+    return poses
+
+# ===================== Headless API =========================================
+
+# Same defaults as the dialog
+DEFAULT_PARAMS = dict(
+    x0=50.0, y0=50.0, w=100.0, h=80.0,
+    scale=None, auto_scale=True,
+    only_selected=False,
+    avoid_collisions=True,
+    collision="bbox",
+    clearance_mm=0.05, step_mm=1.0,
+    use_rotation=False,
+    optimise=False,
+    rot_step_deg=0.0,
+    search="grid",
+    cluster="off",
+    refine_s=0.0,
+    starts=1,
+    seed=0,
+    parse_workers=0
+)
+
+def load_footprints(path):
+    """
+    Read footprint geometry for headless runs, in mm relative to each anchor.
+    JSON: {"R1": {"bbox": [left, top, right, bottom], "orientation": 0, "locked": false,
+                  "pos": [x, y], "outline": [[x, y], ...], "nets": ["VCC", ...]}, ...}
+    CSV:  header ref,left,top,right,bottom[,orientation][,locked][,x,y]
+    A locked footprint with a position is an obstacle for the others; the
+    optional outline (e.g. the courtyard) is used with collision="courtyard",
+    the optional nets with cluster="nets".
+    """
+    if path.lower().endswith(".csv"):
+        out = {}
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                out[row["ref"]] = dict(
+                    bbox=[float(row[k]) for k in ("left", "top", "right", "bottom")],
+                    orientation=float(row.get("orientation") or 0.0),
+                    locked=(row.get("locked") or "").strip().lower() in ("1", "true", "yes"),
+                )
+                if row.get("x") and row.get("y"):
+                    out[row["ref"]]["pos"] = [float(row["x"]), float(row["y"])]
+        return out
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def place(symbols, footprints, params=None, stats=None, sheets=None, anchors=None):
+    """
+    Headless placement. 'symbols' is the table from _read_schematic_symbols,
+    'footprints' the mapping from load_footprints(), 'params' overrides
+    DEFAULT_PARAMS, 'sheets' the optional {ref: sheet} used by the per-sheet
+    ordering and cluster="sheet", with the sheets' 'anchors'. Returns
+    [(ref, (x_mm, y_mm, deg) or None), ...] in placement order; None means
+    no collision-free spot was found.
+    Pass a _PlacementStats as 'stats' to collect counters and timings.
+    """
+    P = dict(DEFAULT_PARAMS)
+    P.update(params or {})
+    clr_nm = _mm_to_nm(P["clearance_mm"])
+    courtyard = P["avoid_collisions"] and P.get("collision") == "courtyard"
+    geoms = {}
+    obstacles = _RectIndex(_index_cell_nm(max(1, _mm_to_nm(P["step_mm"]))))
+    for ref, spec in footprints.items():
+        bbox = tuple(_mm_to_nm(v) for v in spec["bbox"])
+        if spec.get("locked"):
+            if spec.get("pos"):
+                x, y = (_mm_to_nm(v) for v in spec["pos"])
+                obstacles.insert((x + bbox[0] - clr_nm, y + bbox[1] - clr_nm,
+                                  x + bbox[2] + clr_nm, y + bbox[3] + clr_nm))
+            continue
+        hull = None
+        if courtyard and spec.get("outline"):
+            hull = [(_mm_to_nm(x), _mm_to_nm(y)) for x, y in spec["outline"]]
+        geoms[ref] = _RectGeometry(bbox, deg=float(spec.get("orientation", 0.0)), clr_nm=clr_nm, hull=hull)
+    if not symbols:
+        return []
+    nets = None
+    if P.get("cluster") == "nets":
+        nets = _net_clusters({ref: spec.get("nets", ()) for ref, spec in footprints.items() if ref in geoms})
+    job = _plan_placement(symbols, geoms, P, stats, obstacles if len(obstacles) else None,
+                          sheets, nets, anchors)
+    if job is None:
+        return []
+    out = []
+    for (ref, _, _, _), pose in zip(job.items, _compute_placement(job)):
+        if pose is not None:
+            pose = (_nm_to_mm(pose[0]), _nm_to_mm(pose[1]), pose[2])
+        out.append((ref, pose))
+    return out
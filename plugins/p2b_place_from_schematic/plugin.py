@@ -0,0 +1,804 @@
+import os
+import hashlib
+import threading
+import pcbnew
+import wx
+
+from .action import P2BAction
+from .engine import (
+    _SCH_CACHE_NAME, _STATS_NAME, _SchematicSymbols, _RectGeometry,
+    _PlacementStats, _PlacementSession, _PlacementMemo, _RectIndex, _index_cell_nm, _net_clusters,
+    _plan_placement, _compute_placement, _mm_to_nm,
+)
+
+# Keep a single modeless dialog instance alive
+_DLG = None
+
+# Slider previews start once the slider has rested this long
+_PREVIEW_DEBOUNCE_MS = 250
+
+# Search choice labels -> engine "search" parameter
+_SEARCH_MODES = (("Occupancy grid (nearest free spot)", "grid"),
+                 ("Ring probe (8 directions)", "ring"))
+
+# Cluster choice labels -> engine "cluster" parameter
+_CLUSTER_MODES = (("Off (place parts one by one)", "off"),
+                  ("By schematic sheet", "sheet"),
+                  ("By shared nets", "nets"))
+
+# ============================ GUI ============================================
+
+class P2BDialog(wx.Dialog):
+    """Modeless control panel for placement."""
+
+    def __init__(self, parent):
+        wx.Dialog.__init__(
+            self,
+            parent,
+            id=wx.ID_ANY,
+            title="P2B placement",
+            style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER | wx.MAXIMIZE_BOX,
+        )
+
+        self.on_apply = None    # set by plugin
+        self.on_preview = None  # set by plugin: async apply for live preview
+        self.on_close = None    # set by plugin
+        self._preview_timer = None
+
+        root = wx.BoxSizer(wx.VERTICAL)
+        pnl = wx.Panel(self)
+        content = wx.BoxSizer(wx.VERTICAL)
+
+        grid = wx.FlexGridSizer(rows=0, cols=2, vgap=6, hgap=10)
+        grid.AddGrowableCol(1, 1)
+
+        # Inputs
+        self.t_x0   = wx.TextCtrl(pnl, value="50.0")
+        self.t_y0   = wx.TextCtrl(pnl, value="50.0")
+        self.t_w    = wx.TextCtrl(pnl, value="100.0")
+        self.t_h    = wx.TextCtrl(pnl, value="80.0")
+
+        # Scale: auto + slider 1..400 %
+        self.cb_auto_scale = wx.CheckBox(pnl, label="Auto scale to fit")
+        self.cb_auto_scale.SetValue(True)
+        self.s_scale = wx.Slider(pnl, minValue=1, maxValue=100, value=30,
+                                 style=wx.SL_HORIZONTAL | wx.SL_MIN_MAX_LABELS)
+        self.s_scale.Enable(False)
+        self.st_scale = wx.StaticText(pnl, label="Scale: 100 %")
+
+        # Rotation consideration
+        self.cb_use_rot = wx.CheckBox(pnl, label="Consider rotation from schematic")
+        self.cb_use_rot.SetValue(False)
+
+        # Schematic loading
+        self.cb_par_parse = wx.CheckBox(pnl, label="Parallel sheet parsing")
+        self.cb_par_parse.SetValue(False)
+
+        # Diagnostics
+        self.cb_stats = wx.CheckBox(pnl, label=f"Append run stats to {_STATS_NAME}")
+        self.cb_stats.SetValue(False)
+
+        # Selection + collisions
+        self.cb_only_sel = wx.CheckBox(pnl, label="Only selected footprints")
+        self.cb_avoid_col = wx.CheckBox(pnl, label="Avoid collisions")
+        self.cb_avoid_col.SetValue(True)
+        self.cb_courtyard = wx.CheckBox(pnl, label="Courtyard shapes")
+        self.cb_courtyard.SetValue(False)
+        self.t_clearance = wx.TextCtrl(pnl, value="0.05")  # mm
+        self.t_step      = wx.TextCtrl(pnl, value="1.0")  # mm (grid step)
+
+        def row(lbl, ctrl):
+            grid.Add(wx.StaticText(pnl, label=lbl), 0, wx.ALIGN_CENTER_VERTICAL)
+            grid.Add(ctrl, 1, wx.EXPAND)
+
+        row("Origin X (mm):", self.t_x0)
+        row("Origin Y (mm):", self.t_y0)
+        row("Area width (mm):", self.t_w)
+        row("Area height (mm):", self.t_h)
+
+        # Scale row: auto + slider + label
+        hsc = wx.BoxSizer(wx.HORIZONTAL)
+        hsc.Add(self.cb_auto_scale, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 12)
+        hsc.Add(self.s_scale, 1, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 8)
+        hsc.Add(self.st_scale, 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(wx.StaticText(pnl, label="Scale:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(hsc, 1, wx.EXPAND)
+
+        # Rotation row
+        grid.Add(wx.StaticText(pnl, label="Orientation:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(self.cb_use_rot, 0, wx.ALIGN_LEFT)
+
+        # Schematic row
+        grid.Add(wx.StaticText(pnl, label="Schematic:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(self.cb_par_parse, 0, wx.ALIGN_LEFT)
+
+        # Selection + collisions row
+        selcol = wx.BoxSizer(wx.HORIZONTAL)
+        selcol.Add(self.cb_only_sel, 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 16)
+        selcol.Add(self.cb_avoid_col, 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 16)
+        selcol.Add(self.cb_courtyard, 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(wx.StaticText(pnl, label="Scope / collisions:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(selcol, 0, wx.ALIGN_LEFT | wx.EXPAND)
+
+        # Optimiser: try small dθ/dpos locally on collision
+        self.cb_opt = wx.CheckBox(pnl, label="Optimiser (local search)")
+        self.cb_opt.SetValue(False)
+        self.t_rotstep = wx.TextCtrl(pnl, value="0")  # degrees for ±dθ
+        self.t_refine = wx.TextCtrl(pnl, value="0")   # s of annealing after Apply
+        self.cb_incremental = wx.CheckBox(pnl, label="Incremental")  # re-place changed parts only
+        self.cb_incremental.SetValue(False)
+        optrow = wx.BoxSizer(wx.HORIZONTAL)
+        optrow.Add(self.cb_opt, 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 16)
+        optrow.Add(wx.StaticText(pnl, label="Δθ (deg):"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 4)
+        optrow.Add(self.t_rotstep, 0, wx.RIGHT, 16)
+        optrow.Add(wx.StaticText(pnl, label="Refine (s):"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 4)
+        optrow.Add(self.t_refine, 0, wx.RIGHT, 16)
+        optrow.Add(self.cb_incremental, 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(wx.StaticText(pnl, label="Optimiser:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(optrow, 0, wx.ALIGN_LEFT)
+
+        # Search strategy (grid falls back to ring without NumPy) + multi-start
+        self.ch_search = wx.Choice(pnl, choices=[lbl for lbl, _ in _SEARCH_MODES])
+        self.ch_search.SetSelection(0)
+        self.t_starts = wx.TextCtrl(pnl, value="1")  # orderings tried, best one kept
+        self.t_seed = wx.TextCtrl(pnl, value="0")    # seed of the random orderings
+        srow = wx.BoxSizer(wx.HORIZONTAL)
+        srow.Add(self.ch_search, 0, wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 16)
+        srow.Add(wx.StaticText(pnl, label="Starts:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 4)
+        srow.Add(self.t_starts, 0, wx.RIGHT, 16)
+        srow.Add(wx.StaticText(pnl, label="Seed:"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 4)
+        srow.Add(self.t_seed, 0)
+        grid.Add(wx.StaticText(pnl, label="Search:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(srow, 0, wx.ALIGN_LEFT)
+
+        # Clusters: pack each group into a block, then place the blocks
+        self.ch_cluster = wx.Choice(pnl, choices=[lbl for lbl, _ in _CLUSTER_MODES])
+        self.ch_cluster.SetSelection(0)
+        grid.Add(wx.StaticText(pnl, label="Clusters:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(self.ch_cluster, 0, wx.ALIGN_LEFT)
+
+
+        # Collision parameters
+        colp = wx.BoxSizer(wx.HORIZONTAL)
+        colp.Add(wx.StaticText(pnl, label="Clearance (mm):"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 4)
+        colp.Add(self.t_clearance, 0, wx.RIGHT, 16)
+        colp.Add(wx.StaticText(pnl, label="Grid step (mm):"), 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 4)
+        colp.Add(self.t_step, 0)
+        grid.Add(wx.StaticText(pnl, label="Placement grid:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(colp, 0, wx.ALIGN_LEFT)
+
+        # Diagnostics row
+        grid.Add(wx.StaticText(pnl, label="Diagnostics:"), 0, wx.ALIGN_CENTER_VERTICAL)
+        grid.Add(self.cb_stats, 0, wx.ALIGN_LEFT)
+
+        content.Add(grid, 0, wx.ALL | wx.EXPAND, 12)
+
+        # Report of the last run (counts, phase timings, slowest parts)
+        self.st_report = wx.StaticText(pnl, label="")
+        content.Add(self.st_report, 0, wx.LEFT | wx.RIGHT | wx.EXPAND, 12)
+
+        # Buttons: Apply + Close
+        btnrow = wx.BoxSizer(wx.HORIZONTAL)
+        self.btn_apply = wx.Button(pnl, wx.ID_APPLY, "Apply")
+        self.btn_close = wx.Button(pnl, wx.ID_CLOSE, "Close")
+        btnrow.AddStretchSpacer(1)
+        btnrow.Add(self.btn_apply, 0, wx.RIGHT, 8)
+        btnrow.Add(self.btn_close, 0)
+        self.btn_apply.Enable(False)  # until the schematic is loaded
+        content.Add(btnrow, 0, wx.ALL | wx.EXPAND, 10)
+
+        pnl.SetSizer(content)
+        root.Add(pnl, 1, wx.ALL | wx.EXPAND, 0)
+        self.SetSizer(root)
+        self.SetInitialSize(wx.Size(580, 600))
+        self.SetMinSize(wx.Size(520, 360))
+        self.Layout()
+        self.CentreOnParent()
+
+        # Events
+        self.Bind(wx.EVT_CLOSE, self._on_close)
+        self.btn_close.Bind(wx.EVT_BUTTON, self._on_close)
+        self.btn_apply.Bind(wx.EVT_BUTTON, self._on_apply_clicked)
+        self.cb_auto_scale.Bind(wx.EVT_CHECKBOX, self._on_auto_scale)
+        self.s_scale.Bind(wx.EVT_SLIDER, self._on_scale_changed)
+
+    def _on_close(self, evt=None):
+        global _DLG
+        _DLG = None
+        if self._preview_timer is not None:
+            self._preview_timer.Stop()
+        if callable(self.on_close):
+            self.on_close()
+        try:
+            self.Destroy()
+        except Exception:
+            pass
+
+    def _on_auto_scale(self, evt):
+        auto = self.cb_auto_scale.GetValue()
+        self.s_scale.Enable(not auto)
+        self._on_scale_changed(None)
+
+    def _on_scale_changed(self, evt):
+        self.st_scale.SetLabel(f"Scale: {self.s_scale.GetValue()} %")
+        if not callable(self.on_preview):
+            self._on_apply_clicked(None); return
+        # Coalesce slider events: preview once the slider rests for a moment
+        if self._preview_timer is not None and self._preview_timer.IsRunning():
+            self._preview_timer.Restart(_PREVIEW_DEBOUNCE_MS)
+        else:
+            self._preview_timer = wx.CallLater(_PREVIEW_DEBOUNCE_MS, self._on_preview_timer)
+
+    def _on_preview_timer(self):
+        if self.btn_apply.IsEnabled():
+            self.on_preview(self.params())
+
+    def _on_apply_clicked(self, evt):
+        if self._preview_timer is not None:
+            self._preview_timer.Stop()
+        if callable(self.on_apply):
+            self.on_apply(self.params())
+
+    def set_report(self, text):
+        self.st_report.SetLabel(text)
+        self.Layout()
+
+    def set_ready(self, ready):
+        """Enable Apply (and previews) once there is a schematic to place from."""
+        self.btn_apply.Enable(ready)
+
+    def parse_workers(self):
+        """Processes for sheet parsing (0 = serial)."""
+        return (os.cpu_count() or 1) if self.cb_par_parse.GetValue() else 0
+
+    def params(self):
+        def f(x): return float(x.strip())
+        x0 = f(self.t_x0.GetValue())
+        y0 = f(self.t_y0.GetValue())
+        w  = f(self.t_w.GetValue())
+        h  = f(self.t_h.GetValue())
+        auto_scale = self.cb_auto_scale.GetValue()
+        scale = None if auto_scale else (self.s_scale.GetValue() / 100.0)
+        only_sel = self.cb_only_sel.GetValue()
+        avoid_col = self.cb_avoid_col.GetValue()
+        collision = "courtyard" if self.cb_courtyard.GetValue() else "bbox"
+        clr = f(self.t_clearance.GetValue())
+        step = f(self.t_step.GetValue())
+        use_rot = self.cb_use_rot.GetValue()
+        use_rot = self.cb_use_rot.GetValue()
+        optimise = self.cb_opt.GetValue()
+        rot_step_deg = float(self.t_rotstep.GetValue().strip())
+        refine_s = max(0.0, f(self.t_refine.GetValue()))
+        search = _SEARCH_MODES[max(0, self.ch_search.GetSelection())][1]
+        cluster = _CLUSTER_MODES[max(0, self.ch_cluster.GetSelection())][1]
+        starts = max(1, int(f(self.t_starts.GetValue())))
+        seed = int(f(self.t_seed.GetValue()))
+        parse_workers = self.parse_workers()
+        return dict(
+            x0=x0, y0=y0, w=w, h=h,
+            scale=scale, auto_scale=auto_scale,
+            only_selected=only_sel,
+            avoid_collisions=avoid_col,
+            collision=collision,
+            clearance_mm=clr, step_mm=step,
+            use_rotation=use_rot,
+            optimise=optimise,
+            rot_step_deg=rot_step_deg,
+            refine_s=refine_s,
+            incremental=self.cb_incremental.GetValue(),
+            search=search,
+            cluster=cluster,
+            starts=starts, seed=seed,
+            parse_workers=parse_workers,
+            write_stats=self.cb_stats.GetValue()
+        )
+
+# ===================== Board geometry =======================================
+
+def _rect_of(bb):
+    """BOX2I -> (x0, y0, x1, y1) in nm."""
+    return (bb.GetX(), bb.GetY(), bb.GetRight(), bb.GetBottom())
+
+def _fpid(fp):
+    """Library id of a footprint ("lib:name"), or None where pcbnew does not give it."""
+    try:
+        return fp.GetFPIDAsString()
+    except Exception:
+        return None
+
+def _bbox_with_clearance(fp, clr_nm):
+    try:
+        bb = fp.GetBoundingBox(False)  # axis-aligned, accounts for rotation
+    except:
+        bb = fp.GetFootprintRect()
+    bb.Inflate(clr_nm, clr_nm)
+    return bb
+
+def _courtyard_outline(fp):
+    """
+    Outline points of the footprint relative to its anchor for the narrow
+    phase: front courtyard, else back courtyard, else the footprint's hull.
+    None if pcbnew offers none of them.
+    """
+    p = fp.GetPosition()
+    try:
+        fp.BuildCourtyardCaches()
+    except Exception:
+        pass
+    getters = (lambda: fp.GetCourtyard(pcbnew.F_CrtYd),
+               lambda: fp.GetCourtyard(pcbnew.B_CrtYd),
+               lambda: fp.GetBoundingHull())
+    for get in getters:
+        try:
+            poly = get()
+            pts = []
+            for i in range(poly.OutlineCount()):
+                ol = poly.Outline(i)
+                for k in range(ol.PointCount()):
+                    v = ol.CPoint(k)
+                    pts.append((v.x - p.x, v.y - p.y))
+        except Exception:
+            continue
+        if len(pts) >= 3:
+            return pts
+    return None
+
+class _FootprintGeometry(_RectGeometry):
+    """
+    Engine geometry of a board footprint: the inflated bbox is read from
+    pcbnew once per orientation, from a detached copy for orientations other
+    than the current one, so the board is only written by commit(). With
+    'courtyard', its courtyard outline is read once too and rotated by the
+    engine for the narrow phase.
+    """
+
+    def __init__(self, fp, clr_nm, courtyard=False):
+        p = fp.GetPosition()
+        try:
+            deg = fp.GetOrientationDegrees()
+        except Exception:
+            deg = None
+        hull = _courtyard_outline(fp) if courtyard else None
+        _RectGeometry.__init__(self, pos=(p.x, p.y), deg=deg, clr_nm=clr_nm, hull=hull)
+        self.fp = fp
+        self._probe = None  # footprint rotated for bbox reads
+        self._probe_deg = deg
+
+    def _read_extent(self, deg):
+        if deg is None or self.deg is None or deg == self.deg:
+            fp = self.fp
+            if self._probe is fp:
+                self._turn(self.deg)
+        else:
+            fp = self._detached()
+            self._turn(deg)
+        p = fp.GetPosition()
+        x0, y0, x1, y1 = _rect_of(_bbox_with_clearance(fp, self.clr))
+        return (x0 - p.x, y0 - p.y, x1 - p.x, y1 - p.y)
+
+    def _detached(self):
+        if self._probe is None:
+            try:
+                self._probe = pcbnew.FOOTPRINT(self.fp)  # copy, not on the board
+            except Exception:
+                self._probe = self.fp  # no copy constructor: turn the real one, undone in prefill()
+            self._probe_deg = self.deg
+        return self._probe
+
+    def _turn(self, deg):
+        if deg != self._probe_deg:
+            try:
+                self._probe.SetOrientationDegrees(deg); self._probe_deg = deg
+            except Exception:
+                pass
+
+    def prefill(self, degs):
+        """
+        Read the extents for all 'degs' now, so later probes never call into
+        pcbnew (and may run off the UI thread).
+        """
+        for deg in degs:
+            self.extent(deg)
+        if self._probe is self.fp:
+            self._turn(self.deg)
+        self._probe = None
+
+    def commit(self, pose, board_commit=None):
+        """
+        Move the footprint to pose (x, y, deg), recorded in 'board_commit' if
+        given. Returns False, touching nothing, for None or the current pose.
+        """
+        if pose is None:
+            return False
+        x, y, deg = pose
+        turn = deg is not None and self.deg is not None and deg != self.deg
+        if not turn and (x, y) == self.pos:
+            return False
+        if board_commit is not None:
+            try:
+                board_commit.Modify(self.fp)
+            except Exception:
+                pass
+        if turn:
+            self.fp.SetOrientationDegrees(deg)
+        if (x, y) != self.pos:
+            self.fp.SetPosition(pcbnew.VECTOR2I(x, y))
+        return True
+
+def _begin_commit():
+    """
+    A BOARD_COMMIT for one Apply (a single undo step), or None. Stock pcbnew
+    Python modules are not known to expose BOARD_COMMIT or GetBoardFrame;
+    without them Apply edits the footprints directly and cannot be undone.
+    """
+    if not (hasattr(pcbnew, "BOARD_COMMIT") and hasattr(pcbnew, "GetBoardFrame")):
+        return None
+    try:
+        return pcbnew.BOARD_COMMIT(pcbnew.GetBoardFrame())
+    except Exception:
+        return None
+
+def _segment_rects(a, b, clr_nm, piece_nm):
+    """Bboxes of a polyline segment cut into short pieces (keeps diagonals thin)."""
+    n = max(1, int(max(abs(b[0] - a[0]), abs(b[1] - a[1])) // max(1, piece_nm)) + 1)
+    out = []
+    for k in range(n):
+        x0 = a[0] + (b[0] - a[0]) * k // n;       y0 = a[1] + (b[1] - a[1]) * k // n
+        x1 = a[0] + (b[0] - a[0]) * (k + 1) // n; y1 = a[1] + (b[1] - a[1]) * (k + 1) // n
+        out.append((min(x0, x1) - clr_nm, min(y0, y1) - clr_nm, max(x0, x1) + clr_nm, max(y0, y1) + clr_nm))
+    return out
+
+class _StaticObstacles:
+    """
+    What a run must not overlap but never moves: footprints it leaves alone
+    (locked, out of the selection, not in the schematic), footprint keepout
+    rule areas and the board edge. Kept while the panel is open and rebuilt
+    only when the signature of those items changes; a footprint's bbox is
+    re-read only when it moved or was swapped for another library footprint.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self._fp_rects = {}  # (ref, fpid, x, y, deg, clr) -> rect
+        self._sig = None
+        self._index = None
+
+    def index(self, fps, movable, clr_nm, step_nm):
+        """_RectIndex of the obstacles for a run moving 'movable' ({ref: _FootprintGeometry})."""
+        keys = []
+        for fp in fps:
+            g = movable.get(fp.GetReference())
+            if g is not None and g.fp is fp:
+                continue
+            p = fp.GetPosition()
+            try:
+                deg = fp.GetOrientationDegrees()
+            except Exception:
+                deg = None
+            keys.append(((fp.GetReference(), _fpid(fp), p.x, p.y, deg, clr_nm), fp))
+        zones = self._keepouts()
+        edges = self._edge_shapes()
+        sig = (clr_nm, step_nm, frozenset(k for k, _ in keys), tuple(zones), tuple(edges))
+        if sig == self._sig:
+            return self._index
+
+        fp_rects = {}
+        for key, fp in keys:
+            r = self._fp_rects.get(key)
+            if r is None:
+                r = _rect_of(_bbox_with_clearance(fp, clr_nm))
+            fp_rects[key] = r
+        self._fp_rects = fp_rects
+
+        index = _RectIndex(_index_cell_nm(step_nm))
+        for r in fp_rects.values():
+            index.insert(r)
+        for z in zones:
+            index.insert((z[0] - clr_nm, z[1] - clr_nm, z[2] + clr_nm, z[3] + clr_nm))
+        if edges:
+            for r in self._edge_rects(clr_nm, step_nm):
+                index.insert(r)
+        self._sig = sig
+        self._index = index
+        return index
+
+    def fingerprint(self):
+        """
+        SHA-1 of the board as far as a layout depends on it: every
+        footprint's reference, library id, pose, lock and selection, the
+        keepout areas and the board edge.
+        """
+        h = hashlib.sha1()
+        for fp in self.board.GetFootprints():
+            p = fp.GetPosition()
+            try:
+                deg = fp.GetOrientationDegrees()
+            except Exception:
+                deg = None
+            h.update(repr((fp.GetReference(), _fpid(fp), p.x, p.y, deg, fp.IsLocked(), fp.IsSelected())).encode("utf-8"))
+        h.update(repr((self._keepouts(), self._edge_shapes())).encode("utf-8"))
+        return h.hexdigest()
+
+    def _keepouts(self):
+        """Bboxes of rule areas that forbid footprints."""
+        out = []
+        try:
+            zones = list(self.board.Zones())
+        except Exception:
+            return out
+        for z in zones:
+            try:
+                if z.GetIsRuleArea() and z.GetDoNotAllowFootprints():
+                    out.append(_rect_of(z.GetBoundingBox()))
+            except Exception:
+                pass
+        return out
+
+    def _edge_shapes(self):
+        """Signature of the Edge.Cuts drawings (their bboxes)."""
+        try:
+            return [_rect_of(d.GetBoundingBox()) for d in self.board.GetDrawings()
+                    if d.GetLayer() == pcbnew.Edge_Cuts]
+        except Exception:
+            return []
+
+    def _edge_rects(self, clr_nm, step_nm):
+        """The board outline (arcs already segmented by KiCad) as thin rects."""
+        try:
+            outlines = pcbnew.SHAPE_POLY_SET()
+            self.board.GetBoardPolygonOutlines(outlines)
+        except Exception:
+            return []
+        chains = []
+        for i in range(outlines.OutlineCount()):
+            chains.append(outlines.Outline(i))
+            for h in range(outlines.HoleCount(i)):
+                chains.append(outlines.Hole(i, h))
+        out = []
+        for ch in chains:
+            pts = [(ch.CPoint(k).x, ch.CPoint(k).y) for k in range(ch.PointCount())]
+            for a, b in zip(pts, pts[1:] + pts[:1]):
+                out.extend(_segment_rects(a, b, clr_nm, step_nm))
+        return out
+
+class _BackgroundPlacer:
+    """
+    Runs _compute_placement on a worker thread. A new submit() cancels the
+    one in flight; only the latest result is handed to 'commit', on the UI
+    thread via wx.CallAfter. A run that raises is reported in the panel.
+    """
+
+    def __init__(self, commit):
+        self._commit = commit
+        self._gen = 0
+        self._cancel = None
+
+    def submit(self, job, session=None):
+        self.cancel()
+        self._gen += 1
+        self._cancel = threading.Event()
+        threading.Thread(target=self._run, args=(self._gen, job, self._cancel, session),
+                         daemon=True).start()
+
+    def cancel(self):
+        if self._cancel is not None:
+            self._cancel.set()
+
+    def _run(self, gen, job, cancel, session):
+        try:
+            poses = _compute_placement(job, cancel, session)
+        except Exception as e:
+            wx.CallAfter(self._fail, gen, f"{type(e).__name__}: {e}", cancel)
+            return
+        if poses is not None and not cancel.is_set():
+            wx.CallAfter(self._finish, gen, job, poses, cancel)
+
+    def _finish(self, gen, job, poses, cancel):
+        if gen == self._gen and not cancel.is_set():  # not superseded while queued
+            self._commit(job, poses)
+
+    def _fail(self, gen, error, cancel):
+        if gen == self._gen and not cancel.is_set():
+            wx.LogMessage(f"P2B: placement failed: {error}")
+            if _DLG:
+                _DLG.set_report(f"Placement failed, nothing was moved: {error}")
+
+# ===================== Action plugin ========================================
+
+class P2B(P2BAction):
+    def Run(self):
+        board = pcbnew.GetBoard()
+        if not board:
+            return
+
+        # Find schematic
+        brd_path = board.GetFileName()
+        prj_dir = os.path.dirname(brd_path)
+        prj_name = os.path.splitext(os.path.basename(brd_path))[0]
+        sch_path = os.path.join(prj_dir, f"{prj_name}.kicad_sch")
+        if not os.path.exists(sch_path):
+            cands = [p for p in os.listdir(prj_dir) if p.endswith(".kicad_sch")]
+            if not cands:
+                wx.MessageBox("No .kicad_sch in project dir.", "P2B"); return
+            sch_path = os.path.join(prj_dir, cands[0])
+
+        # Parent for DPI/ownership
+        parent = wx.GetTopLevelParent(pcbnew.GetBoardFrame()) if hasattr(pcbnew, "GetBoardFrame") else None
+
+        global _DLG
+        if _DLG and _DLG.IsShown():
+            _DLG.Raise(); _DLG.SetFocus()
+            return
+
+        dlg = _DLG = P2BDialog(parent)
+        obstacles = _StaticObstacles(board)  # reused by every Apply while the panel is open
+        session = _PlacementSession()        # last applied layout, for incremental Applies
+        memo = _PlacementMemo()              # layouts per setting, until the board or schematic changes
+        loaded = {}                          # "schem" once the background load is done
+
+        def commit(job, poses):
+            self._commit_placement(job, poses)
+            memo.put(job, poses, (job.P["memo_scope"][0], obstacles.fingerprint()))
+
+        def reuse(job):
+            # settings computed before on this board and schematic: write their poses
+            poses = memo.get(job)
+            if poses is None:
+                return False
+            placer.cancel()  # a preview still running must not overwrite them
+            job.stats.memo = True
+            job.stats.placed = sum(1 for pose in poses if pose is not None)
+            job.stats.skipped = len(poses) - job.stats.placed
+            commit(job, poses)
+            return True
+
+        placer = _BackgroundPlacer(commit)
+
+        # Load the hierarchy off the UI thread; Apply waits for it
+        def on_progress(sheets, symbols):
+            if _DLG is dlg:
+                dlg.set_report(f"Loading schematic: {sheets} sheets, {symbols} symbols ...")
+
+        def on_loaded(schem, error):
+            if _DLG is not dlg:
+                return
+            if error:
+                dlg.set_report(f"Cannot read the schematic: {error}")
+            elif not schem.symbols:
+                dlg.set_report("No symbols found.")
+            else:
+                loaded["schem"] = schem
+                dlg.set_report(f"Schematic: {len(schem.symbols)} symbols in {len(schem.anchors)} sheets.")
+                dlg.set_ready(True)
+
+        workers = dlg.parse_workers()  # read on the UI thread
+
+        def load():
+            try:
+                schem = _SchematicSymbols(sch_path, cache_path=os.path.join(prj_dir, _SCH_CACHE_NAME),
+                                          workers=workers)
+                schem.refresh(progress=lambda sheets, symbols: wx.CallAfter(on_progress, sheets, symbols))
+            except Exception as e:
+                wx.CallAfter(on_loaded, None, str(e) or type(e).__name__)
+                return
+            wx.CallAfter(on_loaded, schem, None)
+
+        def prepare(params):
+            schem = loaded.get("schem")
+            if schem is None:
+                return None
+            stats = _PlacementStats()
+            schem.workers = params.get("parse_workers", 0)
+            with stats.phase("parse"):
+                schem.refresh()  # pick up schematic edits made while the panel is open
+            if not schem.symbols:
+                wx.LogMessage("P2B: no symbols found."); return None
+            if params.get("write_stats"):
+                params["stats_path"] = os.path.join(prj_dir, _STATS_NAME)
+            params["memo_scope"] = (schem.symbols.fingerprint(), obstacles.fingerprint())
+            return self._prepare_placement(board, schem.symbols, params, stats, obstacles,
+                                           schem.sheets, schem.anchors)
+
+        def on_apply(params):
+            placer.cancel()
+            job = prepare(params)
+            if job is None or reuse(job):
+                return
+            last = session if params.get("incremental") else None
+            if params["cluster"] == "off" and (params["refine_s"] > 0 or params["starts"] > 1):
+                # annealing / several orderings take seconds: run off the UI thread, commit when done
+                _DLG.set_report("Refining for up to %g s ..." % params["refine_s"] if params["starts"] <= 1
+                                else "Trying %d orderings ..." % params["starts"])
+                placer.submit(job, last)
+            else:
+                commit(job, _compute_placement(job, session=last))
+
+        def on_preview(params):
+            params["refine_s"] = 0.0  # previews stay greedy, one ordering
+            params["starts"] = 1
+            job = prepare(params)
+            if job is not None and not reuse(job):
+                placer.submit(job)
+
+        dlg.on_apply = on_apply
+        dlg.on_preview = on_preview
+        dlg.on_close = placer.cancel
+        dlg.set_report("Loading schematic ...")
+        dlg.CentreOnParent()
+        dlg.Show()  # modeless, before the schematic is read
+        threading.Thread(target=load, daemon=True).start()
+
+    # ---------------------- placement apply ---------------------------------
+
+    def _apply_placement(self, board, sympos, P, sheets=None, anchors=None):
+        """Synchronous prepare + compute + commit; returns the run's _PlacementStats (or None)."""
+        job = self._prepare_placement(board, sympos, P, sheets=sheets, anchors=anchors)
+        if job is not None:
+            self._commit_placement(job, _compute_placement(job))
+            return job.stats
+        return None
+
+    def _prepare_placement(self, board, sympos, P, stats=None, obstacles=None, sheets=None, anchors=None):
+        """Snapshot everything a run needs from the board (UI thread); None if nothing to place."""
+        stats = stats if stats is not None else _PlacementStats()
+        obstacles = obstacles if obstacles is not None else _StaticObstacles(board)
+        with stats.phase("snapshot"):
+            fps = list(board.GetFootprints())
+            ref_to_fp = {fp.GetReference(): fp for fp in fps}
+            allowed = {fp.GetReference() for fp in fps if fp.IsSelected()} if P["only_selected"] else None
+
+            # footprints that exist in the schematic and are not locked (+ selection)
+            clr_nm = _mm_to_nm(P["clearance_mm"])
+            courtyard = P["avoid_collisions"] and P.get("collision") == "courtyard"
+            footprints = {}
+            for ref, fp in ref_to_fp.items():
+                if ref not in sympos or (allowed is not None and ref not in allowed):
+                    continue
+                if fp.IsLocked():
+                    continue
+                footprints[ref] = _FootprintGeometry(fp, clr_nm, courtyard)
+            nets = None
+            if P["avoid_collisions"] and P.get("cluster") == "nets":
+                nets = _net_clusters({ref: [pad.GetNetname() for pad in g.fp.Pads()]
+                                      for ref, g in footprints.items()})
+
+        static = None
+        if P["avoid_collisions"]:
+            with stats.phase("obstacles"):
+                static = obstacles.index(fps, footprints, clr_nm, max(1, _mm_to_nm(P["step_mm"])))
+
+        job = _plan_placement(sympos, footprints, P, stats, static, sheets, nets, anchors)
+        if job is None:
+            wx.LogMessage("P2B: no eligible footprints to place.")
+        return job
+
+    def _commit_placement(self, job, poses):
+        """Write the computed poses to the board (UI thread)."""
+        stats = job.stats
+        with stats.phase("refresh"):
+            board_commit = _begin_commit()
+            moved = 0
+            for (_, geom, _, _), pose in zip(job.items, poses):
+                if geom.commit(pose, board_commit):
+                    moved += 1
+            stats.moved = moved
+            if moved:
+                pushed = False
+                if board_commit is not None:
+                    try:
+                        board_commit.Push("P2B placement"); pushed = True
+                    except Exception:
+                        pass
+                if not pushed:
+                    pcbnew.Refresh()
+
+        if _DLG:
+            _DLG.set_report(stats.summary())
+        path = job.P.get("stats_path")
+        if path:
+            try:
+                stats.write_jsonl(path, board=os.path.basename(pcbnew.GetBoard().GetFileName()))
+            except OSError as e:
+                wx.LogMessage(f"P2B: cannot write stats: {e}")
+        if stats.skipped:
+            wx.Bell()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the plugin package lives under plugins/, the synthetic inputs under benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "plugins"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,47 @@
+"""
+Cluster placement: blocks stay whole, leave no overlaps, and place every
+part where plain placement does.
+"""
+import synth
+
+from p2b_place_from_schematic import engine as E
+from util import assert_no_overlaps
+
+def _design(tmp_path, fill=0.35):
+    root, refs = synth.write_hierarchy(str(tmp_path), 600, depth=1, fanout=6)
+    sch = E._SchematicSymbols(root)
+    sch.refresh()
+    sizes = synth.footprint_sizes(refs)
+    # chains of four parts along each sheet, plus one net on everything
+    order = sorted(refs, key=lambda ref: (sch.sheets[ref], ref))
+    nets = {ref: ["N%d" % (k // 4), "GND"] for k, ref in enumerate(order)}
+    footprints = {ref: dict(bbox=(-w / 2, -h / 2, w / 2, h / 2), nets=nets[ref]) for ref, (w, h) in sizes.items()}
+    side = synth.area_for(sizes, fill)
+    return sch, footprints, dict(x0=0.0, y0=0.0, w=side, h=side)
+
+def test_sheet_blocks_stay_whole(tmp_path):
+    # the six sheet boxes sit in one row on the root page: leave that row room
+    sch, footprints, P = _design(tmp_path, fill=0.3)
+    stats = E._PlacementStats()
+    rows = E.place(sch.symbols, footprints, dict(P, cluster="sheet"), stats, sch.sheets, sch.anchors)
+    assert all(pose is not None for _, pose in rows)
+    assert_no_overlaps(rows, footprints)
+    assert stats.clusters["placed"] == stats.clusters["blocks"] == 7
+    assert stats.clusters["loose"] == 0
+    # no sheet's parts land inside another sheet's block
+    boxes = {}
+    for ref, (x, y, _) in rows:
+        b = boxes.get(sch.sheets[ref], (x, y, x, y))
+        boxes[sch.sheets[ref]] = (min(b[0], x), min(b[1], y), max(b[2], x), max(b[3], y))
+    for ref, (x, y, _) in rows:
+        for sheet, b in boxes.items():
+            if sheet != sch.sheets[ref]:
+                assert not (b[0] < x < b[2] and b[1] < y < b[3]), ref
+
+def test_net_clusters_skip_nothing_plain_places(tmp_path):
+    sch, footprints, P = _design(tmp_path, fill=0.39)
+    plain = E.place(sch.symbols, footprints, P)
+    rows = E.place(sch.symbols, footprints, dict(P, cluster="nets"))
+    assert_no_overlaps(rows, footprints)
+    skipped = sum(pose is None for _, pose in rows)
+    assert skipped <= sum(pose is None for _, pose in plain)
@@ -0,0 +1,28 @@
+"""
+Headless engine end to end: placements do not overlap, and the command
+line reports bad input.
+"""
+from p2b_place_from_schematic import cli
+from p2b_place_from_schematic import engine as E
+from util import assert_no_overlaps
+
+def test_place_has_no_overlaps(tmp_path):
+    import synth
+    root, refs = synth.write_hierarchy(str(tmp_path), 400, depth=1, fanout=3)
+    sch = E._SchematicSymbols(root)
+    sch.refresh()
+    assert sorted(sch.symbols) == sorted(refs)
+    sizes = synth.footprint_sizes(refs)
+    footprints = {ref: dict(bbox=(-w / 2, -h / 2, w / 2, h / 2)) for ref, (w, h) in sizes.items()}
+    side = synth.area_for(sizes)
+    for search in ("grid", "ring"):
+        if search == "grid" and E.np is None:
+            continue
+        rows = E.place(sch.symbols, footprints, dict(search=search, x0=0.0, y0=0.0, w=side, h=side))
+        assert_no_overlaps(rows, footprints)
+
+def test_cli_missing_schematic(tmp_path, capsys):
+    fps = tmp_path / "fp.json"
+    fps.write_text("{}")
+    assert cli.main([str(tmp_path / "missing.kicad_sch"), str(fps)]) == 1
+    assert "no such file" in capsys.readouterr().err
@@ -0,0 +1,43 @@
+"""
+Occupancy-grid search: the anchor it returns must be the nearest free one
+over the whole area, whether undecided anchors are tested one by one or a
+window at a time.
+"""
+import random
+
+import pytest
+
+from p2b_place_from_schematic import engine as E
+from util import random_rects
+
+pytestmark = pytest.mark.skipif(E.np is None, reason="needs NumPy")
+
+def test_grid_nearest_is_exhaustive_nearest():
+    rnd = random.Random(3)
+    step = 1000
+    for _ in range(200):
+        area = (0, 0, rnd.randint(10, 40) * step, rnd.randint(10, 40) * step)
+        index = E._RectIndex(E._index_cell_nm(step))
+        grid = E._OccupancyGrid(area, step)
+        for r in random_rects(rnd, area, rnd.randint(0, 30), size=6000):
+            index.insert(r)
+            grid.mark(r)
+        e = (-rnd.randint(100, 3000), -rnd.randint(100, 3000), rnd.randint(100, 3000), rnd.randint(100, 3000))
+        tx = rnd.randint(area[0], area[2]); ty = rnd.randint(area[1], area[3])
+
+        def rect(i, j):
+            x = tx + i * step; y = ty + j * step
+            return (x + e[0], y + e[1], x + e[2], y + e[3])
+
+        def fits(i, j):
+            return not index.intersects(rect(i, j))
+
+        free = [i * i + j * j for i in range(-50, 51) for j in range(-50, 51)
+                if E._inside(rect(i, j), area) and fits(i, j)]
+        hit, _, _ = grid.nearest(e, tx, ty, fits)
+        assert grid.nearest(e, tx, ty, fits, index)[0] == hit
+        if not free:
+            assert hit is None
+            continue
+        assert hit is not None and E._inside(rect(*hit), area) and fits(*hit)
+        assert hit[0] ** 2 + hit[1] ** 2 == min(free)
@@ -0,0 +1,19 @@
+"""
+Spatial index: queries must agree with testing every stored rect.
+"""
+import random
+
+from p2b_place_from_schematic import engine as E
+from util import random_rects
+
+def test_rect_index_matches_brute_force():
+    rnd = random.Random(1)
+    area = (0, 0, 60000, 60000)
+    index = E._RectIndex(4000)
+    rects = random_rects(rnd, area, 300)
+    handles = [index.insert(r) for r in rects]
+    for h in handles[::3]:
+        index.remove(h)
+    live = [r for k, r in enumerate(rects) if k % 3]
+    for probe in random_rects(rnd, area, 500, size=3000):
+        assert index.intersects(probe) == any(E._rects_intersect(probe, r) for r in live)
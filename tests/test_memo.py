@@ -0,0 +1,43 @@
+"""
+Layout memo: a setting tried before gives back its poses; other settings,
+another schematic or board, and evicted entries do not.
+"""
+from p2b_place_from_schematic import engine as E
+from util import synth_design
+
+def test_symbol_table_fingerprint():
+    a = E._SymbolTable([("R1", 1.0, 2.0, None), ("R2", 3.0, 4.0, 90.0)])
+    b = E._SymbolTable([("R1", 1.0, 2.0, None), ("R2", 3.0, 4.0, 90.0)])
+    assert a.fingerprint() == b.fingerprint()
+    b.add("R2", 3.0, 4.5, 90.0)
+    assert a.fingerprint() != b.fingerprint()
+
+def test_memo_reuses_layouts_per_setting(tmp_path):
+    sch, footprints, area = synth_design(tmp_path, 100)
+    geoms = {ref: E._RectGeometry(tuple(E._mm_to_nm(v) for v in spec["bbox"])) for ref, spec in footprints.items()}
+    memo = E._PlacementMemo(size=2)
+
+    def job(**P):
+        return E._plan_placement(sch.symbols, geoms, dict(E.DEFAULT_PARAMS, memo_scope="s1", **dict(area, **P)))
+
+    def run(j):
+        poses = memo.get(j)
+        if poses is None:
+            poses = E._compute_placement(j)
+            memo.put(j, poses, "s1")
+        return poses
+
+    a = run(job(step_mm=1.0))
+    assert memo.get(job(step_mm=1.0)) == a
+    assert memo.get(job(step_mm=1.0, parse_workers=4)) == a  # does not shape the layout
+    assert memo.get(job(step_mm=1.0, incremental=True)) is None
+    assert memo.get(job(step_mm=0.5)) is None
+
+    run(job(step_mm=0.5))
+    run(job(step_mm=2.0))  # evicts step 1.0, the least recently used
+    assert memo.get(job(step_mm=1.0)) is None
+    assert memo.get(job(step_mm=0.5)) is not None
+
+    other = E._plan_placement(sch.symbols, geoms, dict(E.DEFAULT_PARAMS, memo_scope="s2", step_mm=0.5, **area))
+    assert memo.get(other) is None
+    assert memo.get(job(step_mm=0.5)) is None  # the scope change dropped everything
@@ -0,0 +1,17 @@
+"""
+Multi-start: every ordering runs, and the layout kept is the best of them.
+"""
+from p2b_place_from_schematic import engine as E
+from util import assert_no_overlaps, synth_design
+
+def test_multistart_keeps_the_best_start(tmp_path):
+    sch, footprints, P = synth_design(tmp_path, 300, fill=0.5)
+    stats = E._PlacementStats()
+    rows = E.place(sch.symbols, footprints, dict(P, starts=5, seed=7), stats, sch.sheets, sch.anchors)
+    assert_no_overlaps(rows, footprints)
+    assert [s["order"] for s in stats.starts] == list(E._ORDERINGS) + ["random"]
+    best = [s for s in stats.starts if s["best"]]
+    assert len(best) == 1
+    assert min((s["skipped"], s["displacement_mm"]) for s in stats.starts) == \
+        (best[0]["skipped"], best[0]["displacement_mm"])
+    assert sum(pose is None for _, pose in rows) == best[0]["skipped"]
@@ -0,0 +1,23 @@
+"""
+Bulk ordering: the NumPy path must order and map targets exactly like the
+per-symbol one, ties included.
+"""
+import random
+
+import pytest
+
+from p2b_place_from_schematic import engine as E
+
+@pytest.mark.skipif(E.np is None, reason="needs NumPy")
+def test_numpy_ordering_matches_scalar():
+    rnd = random.Random(4)
+    for scale in (None, 0.5):
+        rows = []
+        for k in range(3000):
+            # a coarse lattice, so equal distances (ties by reference) occur
+            rows.append(("U%d" % k, rnd.randint(0, 80) * 1.27, rnd.randint(0, 60) * 1.27,
+                         rnd.choice((0.0, 90.0, None))))
+        table = E._SymbolTable(rows)
+        picked = sorted(rnd.sample(range(len(table)), 2000))
+        P = dict(E.DEFAULT_PARAMS, scale=scale)
+        assert E._order_targets_np(table, picked, P) == E._order_targets(table, picked, P)
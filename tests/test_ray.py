@@ -0,0 +1,39 @@
+"""
+Ray sweep: it must find the same spot as probing every ring, 8 points per
+ring in the original order.
+"""
+import random
+
+from p2b_place_from_schematic import engine as E
+from util import random_rects
+
+def _ring_probe(geom, target, deg, index, step, area):
+    """The per-probe ring search: 8 points per ring, W E N S NW NE SW SE."""
+    tx, ty = target
+    if E._place_ok(geom, tx, ty, deg, area, index):
+        return (tx, ty)
+    for r in range(1, max(area[2] - area[0], area[3] - area[1]) // step + 2):
+        d = r * step
+        for x, y in ((tx - d, ty), (tx + d, ty), (tx, ty - d), (tx, ty + d),
+                     (tx - d, ty - d), (tx + d, ty - d), (tx - d, ty + d), (tx + d, ty + d)):
+            if E._place_ok(geom, x, y, deg, area, index):
+                return (x, y)
+    return None
+
+def test_ray_sweep_matches_ring_probe():
+    rnd = random.Random(2)
+    for _ in range(1500):
+        step = rnd.choice((500, 700, 1000))
+        area = (0, 0, rnd.randint(20, 60) * 1000, rnd.randint(20, 60) * 1000)
+        index = E._RectIndex(step)
+        for r in random_rects(rnd, area, rnd.randint(0, 40)):
+            index.insert(r)
+        w = rnd.randint(100, 6000); h = rnd.randint(100, 6000)
+        geom = E._RectGeometry((-w // 2, -h // 2, w - w // 2, h - h // 2), clr_nm=rnd.choice((0, 50)))
+        target = (rnd.randint(-5000, area[2] + 5000), rnd.randint(-5000, area[3] + 5000))
+        want = _ring_probe(geom, target, None, index, step, area)
+        if want == target:
+            continue
+        radius = max(area[2] - area[0], area[3] - area[1]) // step + 1
+        got = E._ray_nearest_place(geom, target, None, index, step, area, radius)
+        assert (got and got[:2]) == want
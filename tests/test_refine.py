@@ -0,0 +1,15 @@
+"""
+Refinement: annealing may only improve on the greedy layout, never break it.
+"""
+from p2b_place_from_schematic import engine as E
+from util import assert_no_overlaps, synth_design
+
+def test_refine_keeps_layout_valid_and_no_worse(tmp_path):
+    sch, footprints, P = synth_design(tmp_path, 300)
+    greedy = E.place(sch.symbols, footprints, P)
+    stats = E._PlacementStats()
+    rows = E.place(sch.symbols, footprints, dict(P, refine_s=0.3), stats)
+    assert_no_overlaps(rows, footprints)
+    assert [ref for ref, pose in rows if pose] == [ref for ref, pose in greedy if pose]
+    assert stats.refine["moves"] > 0
+    assert stats.refine["after_mm"] <= stats.refine["before_mm"]
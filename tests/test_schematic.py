@@ -0,0 +1,13 @@
+"""
+Schematic loading: progress is reported sheet by sheet.
+"""
+import synth
+
+from p2b_place_from_schematic import engine as E
+
+def test_refresh_reports_every_sheet(tmp_path):
+    root, refs = synth.write_hierarchy(str(tmp_path), 100, depth=1, fanout=6)
+    seen = []
+    E._SchematicSymbols(root).refresh(progress=lambda sheets, symbols: seen.append((sheets, symbols)))
+    assert [s for s, _ in seen] == list(range(1, 8))
+    assert seen[-1][1] == len(refs)
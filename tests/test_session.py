@@ -0,0 +1,36 @@
+"""
+Incremental re-placement: a second run keeps what did not change and
+searches only the rest, without overlapping the kept parts.
+"""
+from p2b_place_from_schematic import engine as E
+from util import synth_design
+
+def _geoms(footprints, poses=None):
+    out = {}
+    for ref, spec in footprints.items():
+        pose = (poses or {}).get(ref)
+        out[ref] = E._RectGeometry(tuple(E._mm_to_nm(v) for v in spec["bbox"]),
+                                   pos=pose[:2] if pose else (0, 0))
+    return out
+
+def test_second_run_replaces_only_the_moved_symbol(tmp_path):
+    sch, footprints, area = synth_design(tmp_path, 300)
+    P = dict(E.DEFAULT_PARAMS, auto_scale=False, scale=0.5, **area)
+    session = E._PlacementSession()
+    job = E._plan_placement(sch.symbols, _geoms(footprints), P)
+    first = dict(zip((it[0] for it in job.items), E._run_placement(job, session=session)))
+
+    # as if committed to the board; then one symbol moves in the schematic
+    ref = sorted(first)[0]
+    x, y, rot = sch.symbols[ref]
+    sch.symbols.add(ref, x + 2.54, y, rot)
+    job = E._plan_placement(sch.symbols, _geoms(footprints, first), P)
+    second = dict(zip((it[0] for it in job.items), E._run_placement(job, session=session)))
+
+    assert job.stats.kept == len(first) - 1
+    assert {r: p for r, p in second.items() if r != ref} == {r: p for r, p in first.items() if r != ref}
+    index = E._RectIndex(E._index_cell_nm(job.step_nm))
+    for (r, geom, _, _) in job.items:
+        rect = geom.rect(*second[r])
+        assert not index.intersects(rect), r
+        index.insert(rect)
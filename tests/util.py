@@ -0,0 +1,32 @@
+def random_rects(rnd, area, n, size=8000):
+    """n random rects (x0, y0, x1, y1) with corners in 'area', sides up to 'size' nm."""
+    out = []
+    for _ in range(n):
+        x = rnd.randint(area[0], area[2]); y = rnd.randint(area[1], area[3])
+        out.append((x, y, x + rnd.randint(100, size), y + rnd.randint(100, size)))
+    return out
+
+def assert_no_overlaps(rows, footprints):
+    """No two placed footprints of place()'s 'rows' overlap (bboxes in mm)."""
+    from p2b_place_from_schematic import engine as E
+    index = E._RectIndex(E._index_cell_nm(E._mm_to_nm(1.0)))
+    for ref, pose in rows:
+        if pose is None:
+            continue
+        x, y = E._mm_to_nm(pose[0]), E._mm_to_nm(pose[1])
+        l, t, r, b = (E._mm_to_nm(v) for v in footprints[ref]["bbox"])
+        rect = (x + l, y + t, x + r, y + b)
+        assert not index.intersects(rect), ref
+        index.insert(rect)
+
+def synth_design(tmp_path, n, depth=1, fanout=3, fill=0.35):
+    """A synthetic hierarchy of n parts: (schematic, place() footprints, area params)."""
+    import synth
+    from p2b_place_from_schematic import engine as E
+    root, refs = synth.write_hierarchy(str(tmp_path), n, depth=depth, fanout=fanout)
+    sch = E._SchematicSymbols(root)
+    sch.refresh()
+    sizes = synth.footprint_sizes(refs)
+    footprints = {ref: dict(bbox=(-w / 2, -h / 2, w / 2, h / 2)) for ref, (w, h) in sizes.items()}
+    side = synth.area_for(sizes, fill)
+    return sch, footprints, dict(x0=0.0, y0=0.0, w=side, h=side)